@@ -0,0 +1,3 @@
+"""
+性能测试工具：端到端压测与微基准测试
+"""
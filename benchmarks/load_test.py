@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+chat / graph / decision 接口的端到端压测工具
+
+按目标并发数（闭环）或目标到达率（开环，泊松到达）回放问题语料和决策请求，
+统计首个数据块时间、总延迟分位数、吞吐量、响应字节数和错误率，并保存JSON报告，
+便于在不同提交之间对比
+
+示例:
+    # 启动使用stub后端的本地服务，以4并发压测60秒
+    python benchmarks/load_test.py --start-server --concurrency 4 --duration 60
+
+    # 对已运行的服务按每秒2个请求的到达率压测，并与上次的报告对比
+    python benchmarks/load_test.py --url http://localhost:5000 --rate 2 --baseline last.json
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus.json')
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="CCUS服务端到端压测")
+    parser.add_argument("--url", type=str, default="http://localhost:5000", help="服务地址")
+    parser.add_argument("--start-server", action="store_true", help="在本地启动一个服务进程用于压测")
+    parser.add_argument("--backend", type=str, default="stub", help="本地服务使用的LLM后端")
+    parser.add_argument("--corpus", type=str, default=DEFAULT_CORPUS, help="问题和决策请求语料")
+    parser.add_argument("--mix", type=str, default="chat:6,decision:3,graph:1", help="各接口请求比例")
+    parser.add_argument("--concurrency", type=int, default=4, help="闭环模式的并发数")
+    parser.add_argument("--rate", type=float, default=0.0, help="开环模式的到达率（请求/秒），>0时启用")
+    parser.add_argument("--duration", type=float, default=30.0, help="压测时长（秒）")
+    parser.add_argument("--requests", type=int, default=0, help="最大请求数，0表示只按时长限制")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单个请求超时时间（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", type=str, default=None, help="报告保存路径")
+    parser.add_argument("--baseline", type=str, default=None, help="用于对比的历史报告")
+    return parser.parse_args()
+
+
+# ===== 请求定义 =====
+
+def build_request(kind, corpus, rng):
+    """根据接口类型从语料中构造一个请求 (method, path, payload)"""
+    if kind == "chat":
+        return "POST", "/chat/", {"prompt": rng.choice(corpus["chat"]), "history": []}
+    if kind == "decision":
+        return "POST", "/api/ccus/decision", rng.choice(corpus["decision"])
+    if kind == "graph":
+        return "GET", "/graph/", None
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+def parse_mix(mix):
+    """解析 chat:6,decision:3,graph:1 格式的请求比例"""
+    kinds, weights = [], []
+    for part in mix.split(","):
+        kind, _, weight = part.partition(":")
+        kinds.append(kind.strip())
+        weights.append(float(weight or 1))
+    return kinds, weights
+
+
+def send_request(session, base_url, kind, method, path, payload, timeout):
+    """发送请求并以流式方式读取响应，记录首个数据块时间和总延迟"""
+    record = {"kind": kind, "status": None, "ttfb": None, "latency": None, "bytes": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        response = session.request(
+            method, base_url + path,
+            data=json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None,
+            headers={'Content-Type': 'application/json'},
+            stream=True,
+            timeout=timeout
+        )
+        record["status"] = response.status_code
+        for chunk in response.iter_content(chunk_size=None):
+            if record["ttfb"] is None:
+                record["ttfb"] = time.perf_counter() - start
+            record["bytes"] += len(chunk)
+        response.close()
+        if response.status_code >= 400:
+            record["error"] = f"HTTP {response.status_code}"
+    except Exception as e:
+        record["error"] = type(e).__name__
+    record["latency"] = time.perf_counter() - start
+    return record
+
+
+# ===== 负载生成 =====
+
+class LoadGenerator:
+
+    def __init__(self, args, corpus):
+        self.args = args
+        self.corpus = corpus
+        self.kinds, self.weights = parse_mix(args.mix)
+        self.records = []
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _next_request(self, rng):
+        """申请下一个请求，达到请求数上限时返回None"""
+        with self._lock:
+            if self.args.requests and self._issued >= self.args.requests:
+                return None
+            self._issued += 1
+        kind = rng.choices(self.kinds, self.weights)[0]
+        return (kind,) + build_request(kind, self.corpus, rng)
+
+    def _fire(self, request):
+        kind, method, path, payload = request
+        record = send_request(self._session(), self.args.url, kind, method, path, payload, self.args.timeout)
+        with self._lock:
+            self.records.append(record)
+
+    def run_closed_loop(self, deadline):
+        """闭环模式：固定数量的并发用户，每个用户收到响应后立即发送下一个请求"""
+        def worker(worker_id):
+            rng = random.Random(self.args.seed * 1000 + worker_id)
+            while time.perf_counter() < deadline:
+                request = self._next_request(rng)
+                if request is None:
+                    return
+                self._fire(request)
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(self.args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def run_open_loop(self, deadline):
+        """开环模式：请求按泊松过程到达，不受服务端响应速度影响"""
+        rng = random.Random(self.args.seed)
+        # 线程数上限避免服务端严重过载时压测端自身耗尽资源
+        max_workers = max(self.args.concurrency, int(self.args.rate * self.args.timeout) + 1)
+        with ThreadPoolExecutor(max_workers=min(max_workers, 512)) as pool:
+            next_arrival = time.perf_counter()
+            while next_arrival < deadline:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                request = self._next_request(rng)
+                if request is None:
+                    break
+                pool.submit(self._fire, request)
+                next_arrival += rng.expovariate(self.args.rate)
+
+    def run(self):
+        start = time.perf_counter()
+        deadline = start + self.args.duration
+        if self.args.rate > 0:
+            self.run_open_loop(deadline)
+        else:
+            self.run_closed_loop(deadline)
+        return time.perf_counter() - start
+
+
+# ===== 统计与报告 =====
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(records, elapsed):
+    """汇总一组请求记录"""
+    ok = [r for r in records if r["error"] is None]
+    latencies = sorted(r["latency"] for r in ok)
+    ttfbs = sorted(r["ttfb"] for r in ok if r["ttfb"] is not None)
+    total_bytes = sum(r["bytes"] for r in ok)
+
+    def dist(values):
+        return {
+            "p50": percentile(values, 0.50),
+            "p90": percentile(values, 0.90),
+            "p99": percentile(values, 0.99),
+            "max": values[-1] if values else None,
+        }
+
+    errors = {}
+    for r in records:
+        if r["error"] is not None:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    return {
+        "requests": len(records),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else 0.0,
+        "errors": errors,
+        "throughput": round(len(ok) / elapsed, 3) if elapsed > 0 else 0.0,
+        "ttfb": dist(ttfbs),
+        "latency": dist(latencies),
+        "bytes_avg": round(total_bytes / len(ok), 1) if ok else 0,
+        "bytes_total": total_bytes,
+    }
+
+
+def build_report(args, records, elapsed):
+    by_kind = {}
+    for r in records:
+        by_kind.setdefault(r["kind"], []).append(r)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": git_commit(),
+            "url": args.url,
+            "mode": "open" if args.rate > 0 else "closed",
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration": round(elapsed, 3),
+            "mix": args.mix,
+            "seed": args.seed,
+            "backend": args.backend if args.start_server else None,
+        },
+        "overall": summarize(records, elapsed),
+        "endpoints": {kind: summarize(rs, elapsed) for kind, rs in sorted(by_kind.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def _fmt(value, scale=1000.0, unit="ms"):
+    return "-" if value is None else f"{value * scale:.1f}{unit}"
+
+
+def print_report(report, baseline=None):
+    meta = report["meta"]
+    print(f"\n📊 压测结果 ({meta['mode']} loop, {meta['duration']}s, commit {meta['commit']})")
+    header = f"{'endpoint':<10}{'reqs':>7}{'err%':>7}{'rps':>8}{'ttfb p50':>11}{'ttfb p99':>11}{'lat p50':>11}{'lat p99':>11}{'bytes':>11}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        print(f"{name:<10}{s['requests']:>7}{s['error_rate'] * 100:>6.1f}%{s['throughput']:>8.2f}"
+              f"{_fmt(s['ttfb']['p50']):>11}{_fmt(s['ttfb']['p99']):>11}"
+              f"{_fmt(s['latency']['p50']):>11}{_fmt(s['latency']['p99']):>11}{s['bytes_avg']:>11.0f}")
+        if s["errors"]:
+            print(f"{'':<10}errors: {s['errors']}")
+
+    if baseline:
+        print(f"\n🔁 对比基线 (commit {baseline['meta'].get('commit')})")
+        for name, s in rows:
+            base = baseline["overall"] if name == "overall" else baseline["endpoints"].get(name)
+            if not base:
+                continue
+            deltas = []
+            for label, cur, old in [
+                ("rps", s["throughput"], base["throughput"]),
+                ("lat p50", s["latency"]["p50"], base["latency"]["p50"]),
+                ("lat p99", s["latency"]["p99"], base["latency"]["p99"]),
+                ("ttfb p99", s["ttfb"]["p99"], base["ttfb"]["p99"]),
+            ]:
+                if cur is not None and old:
+                    deltas.append(f"{label} {(cur - old) / old * 100:+.1f}%")
+            print(f"{name:<10}{', '.join(deltas)}")
+
+
+# ===== 本地服务 =====
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+
+def start_server(backend, startup_timeout=300.0):
+    """在 server/ 目录下启动服务进程，等待其可以响应请求"""
+    port = find_free_port()
+    env = dict(os.environ, SERVER_PORT=str(port), LLM_BACKEND=backend)
+    log_path = os.path.join(ROOT_DIR, "server", "load_test_server.log")
+    log_file = open(log_path, "w", encoding="utf-8")
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=os.path.join(ROOT_DIR, "server"),
+        env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+    url = f"http://localhost:{port}"
+
+    print(f"🚀 启动本地服务 {url} (backend={backend}, 日志: {log_path})")
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务进程退出，返回码 {process.returncode}，请查看 {log_path}")
+        try:
+            if requests.get(url + "/", timeout=1).status_code == 200:
+                print("✅ 本地服务已就绪")
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError("等待服务启动超时")
+
+
+def main():
+    args = arg_parser()
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    server = None
+    if args.start_server:
+        server, args.url = start_server(args.backend)
+
+    try:
+        print(f"🔥 开始压测 {args.url}: mix={args.mix}, "
+              + (f"rate={args.rate}/s" if args.rate > 0 else f"concurrency={args.concurrency}")
+              + f", duration={args.duration}s")
+        generator = LoadGenerator(args, corpus)
+        elapsed = generator.run()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = build_report(args, generator.records, elapsed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(
+        ROOT_DIR, "benchmarks", "results",
+        f"load_{time.strftime('%Y%m%d-%H%M%S')}_{report['meta']['commit'] or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 报告已保存: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检索、NER、决策引擎和格式转换的微基准测试
+
+对 Ner.get_entities、search_node_item、get_entity_details、extract_knowledge_content、
+CCUSDecisionEngine.recommend_technologies 和 KnowledgeGraphConverter.convert_spn_to_frontend
+在多个图谱规模下使用固定输入计时，报告 min / median / p95 和峰值内存分配，
+并与保存的基线对比，中位数变慢超过阈值时以非零返回码退出
+
+示例:
+    # 首次运行并保存基线
+    python benchmarks/micro.py --update-baseline
+
+    # 修改代码后对比基线，变慢超过15%视为回归
+    python benchmarks/micro.py --threshold 0.15
+
+    # 只测部分用例
+    python benchmarks/micro.py --only search_node_item,recommend_technologies --scales 1,2
+
+    # 使用合成图谱（见 synthetic_graph.py）在更大规模下测试
+    python benchmarks/micro.py --synthetic 10000,100000 --only recommend_technologies
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT_DIR, 'server')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, SERVER_DIR)
+
+FRONTEND_GRAPH_PATH = os.path.join(SERVER_DIR, 'data', 'data.json')
+SPN_GRAPH_PATH = os.path.join(ROOT_DIR, 'data', 'ccus_v1', 'base_refined.json')
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'benchmarks', 'micro_baseline.json')
+
+# 固定输入
+NER_TEXT = "鄂尔多斯的CCUS示范项目采用化学吸收法捕集燃煤电厂排放的二氧化碳，并在深部咸水层进行地质封存，捕集率达到90%"
+SEARCH_TERMS = ["CCUS", "二氧化碳", "伊金霍洛旗"]
+DECISION_REQUEST = {
+    "region_info": {"地区名称": "山东省", "主要产业": ["钢铁", "化工"], "地质条件": "适合封存"},
+    "policy_context": {"政策支持": "CCUS示范项目", "资金支持": "国家专项资金"},
+    "preferences": {"技术成熟度": "商业化", "投资预算": "10亿元", "适用行业": ["钢铁", "电力"]},
+}
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="CCUS服务微基准测试")
+    parser.add_argument("--scales", type=str, default="1,2,4", help="图谱放大倍数，逗号分隔")
+    parser.add_argument("--synthetic", type=str, default=None, help="改用合成图谱，指定边数，逗号分隔")
+    parser.add_argument("--seed", type=int, default=0, help="合成图谱的随机种子")
+    parser.add_argument("--repeat", type=int, default=10, help="每个用例的计时次数")
+    parser.add_argument("--warmup", type=int, default=2, help="预热次数")
+    parser.add_argument("--only", type=str, default=None, help="只运行指定的用例，逗号分隔")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--threshold", type=float, default=0.10, help="中位数变慢超过该比例视为回归")
+    parser.add_argument("--output", type=str, default=None, help="本次结果保存路径")
+    return parser.parse_args()
+
+
+# ===== 测试数据 =====
+
+def scale_frontend_graph(data, scale):
+    """将前端格式图谱复制 scale 份，每份的节点名加后缀，保持各份之间互不相连"""
+    if scale == 1:
+        return data
+
+    nodes, links, sents = [], [], {}
+    base_sents = data.get('sents', {})
+    if isinstance(base_sents, list):
+        base_sents = {str(i): s for i, s in enumerate(base_sents)}
+
+    for k in range(scale):
+        node_offset = len(nodes)
+        suffix = "" if k == 0 else f"#{k}"
+        for node in data['nodes']:
+            node = dict(node)
+            node['id'] = node_offset + int(node['id'])
+            node['name'] = node['name'] + suffix
+            nodes.append(node)
+        sent_offset = k * len(base_sents)
+        for link in data['links']:
+            link = dict(link)
+            link['source'] = node_offset + int(link['source'])
+            link['target'] = node_offset + int(link['target'])
+            if str(link.get('sent', '')).lstrip('-').isdigit() and int(link['sent']) >= 0:
+                link['sent'] = sent_offset + int(link['sent'])
+            links.append(link)
+        for key, sent in base_sents.items():
+            sents[str(sent_offset + int(key))] = sent
+
+    return {"nodes": nodes, "links": links, "sents": sents, "categories": data.get('categories', [])}
+
+
+def scale_spn_lines(lines, scale):
+    """将SPN格式的句子复制 scale 份，每份的实体名加后缀"""
+    scaled = []
+    for k in range(scale):
+        suffix = "" if k == 0 else f"#{k}"
+        for line in lines:
+            line = dict(line)
+            line['id'] = len(scaled)
+            line['relationMentions'] = [
+                dict(rel, em1Text=rel.get('em1Text', '') + suffix, em2Text=rel.get('em2Text', '') + suffix)
+                for rel in line.get('relationMentions', [])
+            ]
+            scaled.append(line)
+    return scaled
+
+
+class Fixture:
+    """某个规模下各用例共享的输入数据"""
+
+    def __init__(self, size, graph, spn_lines, workdir):
+        self.size = size
+        self.graph = graph
+        self.spn_path = os.path.join(workdir, f'spn_{size}.json')
+        with open(self.spn_path, 'w', encoding='utf-8') as f:
+            for line in spn_lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.output_path = os.path.join(workdir, f'frontend_{size}.json')
+        self.entity_names = {node['name'] for node in self.graph['nodes'] if len(node['name']) > 1}
+        self._subgraphs = {}
+
+    def subgraph(self, term):
+        """search_node_item 的检索结果，供依赖子图的用例复用"""
+        from app.utils.graph_utils import search_node_item
+        if term not in self._subgraphs:
+            with quiet():
+                self._subgraphs[term] = search_node_item(term, data=self.graph)
+        return self._subgraphs[term]
+
+
+# ===== 用例 =====
+
+def case_ner(fixture):
+    from app.utils.ner import Ner
+    with quiet():
+        ner = Ner()
+    ner.entity_dict = ner.entity_dict | fixture.entity_names
+    return lambda: ner.get_entities(NER_TEXT)
+
+
+def case_search_node_item(fixture):
+    from app.utils.graph_utils import search_node_item
+
+    def run():
+        for term in SEARCH_TERMS:
+            search_node_item(term, data=fixture.graph)
+    return run
+
+
+def case_get_entity_details(fixture):
+    from app.utils.graph_utils import get_entity_details
+    graphs = [(term, fixture.subgraph(term)) for term in SEARCH_TERMS]
+
+    def run():
+        for term, graph in graphs:
+            get_entity_details(term, graph)
+    return run
+
+
+def case_extract_knowledge_content(fixture):
+    from app.utils.graph_utils import extract_knowledge_content
+    graphs = [(term, fixture.subgraph(term)) for term in SEARCH_TERMS]
+
+    def run():
+        for term, graph in graphs:
+            extract_knowledge_content(graph, term)
+    return run
+
+
+def case_recommend_technologies(fixture):
+    from modules.ccus_decision_engine import CCUSDecisionEngine
+    with quiet():
+        # 不使用结果缓存，否则预热之后每次都只是缓存命中，测不到评分本身
+        engine = CCUSDecisionEngine(fixture.spn_path, cache_size=0)
+    return lambda: engine.recommend_technologies(
+        DECISION_REQUEST["region_info"], DECISION_REQUEST["policy_context"], DECISION_REQUEST["preferences"]
+    )
+
+
+def case_convert_spn_to_frontend(fixture):
+    from app.utils.kg_converter import KnowledgeGraphConverter
+    converter = KnowledgeGraphConverter()
+    return lambda: converter.convert_spn_to_frontend(fixture.spn_path, fixture.output_path, layout=False)
+
+
+CASES = {
+    "ner_get_entities": case_ner,
+    "search_node_item": case_search_node_item,
+    "get_entity_details": case_get_entity_details,
+    "extract_knowledge_content": case_extract_knowledge_content,
+    "recommend_technologies": case_recommend_technologies,
+    "convert_spn_to_frontend": case_convert_spn_to_frontend,
+}
+
+
+# ===== 计时 =====
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽被测函数的调试输出，避免刷屏（输出本身的开销仍计入耗时）"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(func, repeat, warmup):
+    """计时并统计一次调用的峰值内存分配"""
+    with quiet():
+        for _ in range(warmup):
+            func()
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        # tracemalloc 会显著拖慢执行，单独运行一次统计内存
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "min": timings[0],
+        "median": statistics.median(timings),
+        "p95": timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+        "alloc_peak_kb": round(peak / 1024, 1),
+        "repeat": repeat,
+    }
+
+
+def compare(results, baseline, threshold):
+    """与基线对比，返回回归的用例列表"""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base or not base.get("median"):
+            continue
+        change = (cur["median"] - base["median"]) / base["median"]
+        cur["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append((key, change))
+    return regressions
+
+
+def iter_fixtures(args, workdir):
+    """按放大倍数或合成图谱边数依次构造测试数据"""
+    if args.synthetic:
+        from benchmarks.synthetic_graph import generate_graph, iter_spn_lines, to_frontend
+        for num_edges in [int(s) for s in args.synthetic.split(",")]:
+            graph = generate_graph(num_edges, seed=args.seed)
+            yield Fixture(f"e{num_edges}", to_frontend(graph), iter_spn_lines(graph), workdir)
+        return
+
+    with open(FRONTEND_GRAPH_PATH, 'r', encoding='utf-8') as f:
+        frontend_graph = json.load(f)
+    with open(SPN_GRAPH_PATH, 'r', encoding='utf-8') as f:
+        spn_lines = [json.loads(line) for line in f if line.strip()]
+    for scale in [int(s) for s in args.scales.split(",")]:
+        yield Fixture(f"x{scale}", scale_frontend_graph(frontend_graph, scale),
+                      scale_spn_lines(spn_lines, scale), workdir)
+
+
+def print_results(results, graph_sizes):
+    print(f"\n{'case':<40}{'min':>11}{'median':>11}{'p95':>11}{'peak KB':>11}{'vs base':>10}")
+    print("-" * 94)
+    for key, r in results.items():
+        change = f"{r['change'] * 100:+.1f}%" if "change" in r else "-"
+        print(f"{key:<40}{r['min'] * 1000:>9.2f}ms{r['median'] * 1000:>9.2f}ms{r['p95'] * 1000:>9.2f}ms"
+              f"{r['alloc_peak_kb']:>11.1f}{change:>10}")
+    print("\n图谱规模: " + ", ".join(f"{s}: {n} nodes / {e} links" for s, (n, e) in graph_sizes.items()))
+
+
+def main():
+    args = arg_parser()
+    names = args.only.split(",") if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        sys.exit(f"Unknown cases: {unknown}, available: {list(CASES)}")
+
+    results, graph_sizes = {}, {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for fixture in iter_fixtures(args, workdir):
+            graph_sizes[fixture.size] = (len(fixture.graph['nodes']), len(fixture.graph['links']))
+            for name in names:
+                key = f"{name}@{fixture.size}"
+                print(f"⏱️  {key} ...", flush=True)
+                with quiet():
+                    func = CASES[name](fixture)
+                results[key] = measure(func, args.repeat, args.warmup)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f).get("results", {}), args.threshold)
+
+    print_results(results, graph_sizes)
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "sizes": list(graph_sizes), "repeat": args.repeat},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 基线已更新: {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 个性能回归 (阈值 {args.threshold * 100:.0f}%):")
+        for key, change in regressions:
+            print(f"   - {key}: {change * 100:+.1f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可扩展的CCUS合成知识图谱生成器
+
+生成与真实数据格式一致的SPN风格JSONL（data/ccus_v1/*.json）和前端格式
+{nodes, links, sents, categories}（data/ccus_data.json），用于在生产规模下做性能测试:
+- 关系标签取自 data/schema/schema_ccus.py，按头实体类型抽取
+- 实体名由地名、领域术语和类型后缀组合成中文名称
+- 节点度数服从幂律分布
+- 相同参数和种子生成完全相同的图谱
+
+示例:
+    python benchmarks/synthetic_graph.py --edges 100000 --spn-output /tmp/kg_100k.json \\
+        --frontend-output /tmp/graph_100k.json
+"""
+
+import argparse
+import json
+import os
+import runpy
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(ROOT_DIR, 'data', 'schema', 'schema_ccus.py')
+
+# 与 generate_ccus_graph.py 中的 entity_type_mapping 保持一致
+ENTITY_TYPES = ["CCUS技术", "行业", "地区", "政策", "项目", "成本", "效益", "风险", "标准", "其他"]
+
+# 实体类型在图谱中的占比
+TYPE_WEIGHTS = [0.22, 0.08, 0.12, 0.10, 0.18, 0.07, 0.06, 0.06, 0.05, 0.06]
+
+PLACES = [
+    "山东", "内蒙古", "鄂尔多斯", "陕西", "榆林", "新疆", "准噶尔", "吉林", "松原", "大庆",
+    "胜利", "华北", "渤海湾", "广东", "惠州", "江苏", "泰州", "宁夏", "宁东", "四川",
+    "重庆", "天津", "河北", "唐山", "山西", "上海", "浙江", "海南", "甘肃", "青海",
+    "北京", "辽宁", "黑龙江", "安徽", "湖北", "福建", "塔里木", "长庆", "延长", "齐鲁",
+]
+
+TERMS = [
+    "碳捕集", "二氧化碳", "CCUS", "CCS", "燃烧后捕集", "燃烧前捕集", "富氧燃烧", "化学吸收",
+    "物理吸附", "膜分离", "低温精馏", "直接空气捕集", "胺法", "吸收塔", "再生塔", "压缩",
+    "管道输送", "船舶运输", "驱油", "驱气", "咸水层封存", "枯竭油气藏", "地质封存", "矿化利用",
+    "化工利用", "生物利用", "合成甲醇", "制氢", "燃煤电厂", "燃气电厂", "钢铁", "水泥",
+    "煤化工", "石油化工", "炼化", "电解铝", "玻璃", "造纸", "碳交易", "碳配额",
+    "碳中和", "碳达峰", "减排", "监测", "泄漏", "能耗", "捕集率", "封存潜力",
+]
+
+TYPE_SUFFIXES = {
+    "CCUS技术": ["技术", "工艺", "系统", "装置", "方法", "路线"],
+    "行业": ["行业", "产业", "企业", "领域", "板块"],
+    "地区": ["地区", "盆地", "油田", "园区", "基地", "区块"],
+    "政策": ["政策", "行动方案", "指导意见", "管理办法", "实施细则", "规划"],
+    "项目": ["示范项目", "工程", "一期工程", "二期工程", "试验项目", "全流程项目"],
+    "成本": ["成本", "投资", "运维费用", "单位成本", "能耗成本"],
+    "效益": ["效益", "减排量", "经济收益", "环境效益", "增油量"],
+    "风险": ["风险", "泄漏风险", "安全隐患", "技术瓶颈", "政策不确定性"],
+    "标准": ["标准", "规范", "技术要求", "评价方法", "导则"],
+    "其他": ["研究", "报告", "平台", "中心", "联盟"],
+}
+
+
+def load_schema_relations(schema_path=SCHEMA_PATH):
+    """读取schema中每种实体类型可用的关系标签"""
+    schema = runpy.run_path(schema_path)['schema']
+    relations = {etype: list(labels) for etype, labels in schema.items()}
+    # schema 中没有定义的类型使用全部标签
+    all_labels = sorted({label for labels in relations.values() for label in labels})
+    for etype in ENTITY_TYPES:
+        relations.setdefault(etype, all_labels)
+    return relations
+
+
+class SyntheticGraph:
+    """合成图谱，节点和边以numpy数组保存"""
+
+    def __init__(self, names, node_types, sources, targets, labels, label_names, sent_ids):
+        self.names = names              # 节点名称列表
+        self.node_types = node_types    # 节点类型下标 (int8)
+        self.sources = sources          # 边的头实体 (int32)
+        self.targets = targets          # 边的尾实体 (int32)
+        self.labels = labels            # 边的关系标签下标 (int32)
+        self.label_names = label_names  # 关系标签列表
+        self.sent_ids = sent_ids        # 边所属的句子 (int32)，同一句子的边连续存放
+
+    @property
+    def num_nodes(self):
+        return len(self.names)
+
+    @property
+    def num_edges(self):
+        return len(self.sources)
+
+    @property
+    def num_sents(self):
+        return int(self.sent_ids[-1]) + 1 if self.num_edges else 0
+
+    def degrees(self):
+        return np.bincount(np.concatenate([self.sources, self.targets]), minlength=self.num_nodes)
+
+
+def _entity_names(node_types, rng):
+    """按 地名 + 术语 + 类型后缀 组合生成互不重复的实体名"""
+    places = list(PLACES)
+    terms = list(TERMS)
+    rng.shuffle(places)
+    rng.shuffle(terms)
+
+    names = []
+    counters = {}
+    for etype in node_types:
+        etype = ENTITY_TYPES[etype]
+        suffixes = TYPE_SUFFIXES[etype]
+        i = counters.get(etype, 0)
+        counters[etype] = i + 1
+
+        # 混合进制展开下标，组合用尽后追加编号保证唯一
+        term = terms[i % len(terms)]
+        i //= len(terms)
+        suffix = suffixes[i % len(suffixes)]
+        i //= len(suffixes)
+        if i == 0:
+            names.append(f"{term}{suffix}")
+            continue
+        i -= 1
+        place = places[i % len(places)]
+        i //= len(places)
+        names.append(f"{place}{term}{suffix}" if i == 0 else f"{place}{term}{suffix}（{i}号）")
+    return names
+
+
+def _power_law_nodes(rng, num_nodes, size, alpha):
+    """按幂律权重 (rank+1)^-alpha 抽取节点，并用随机排列打散高权重节点的编号"""
+    weights = np.arange(1, num_nodes + 1, dtype=np.float64) ** (-alpha)
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    ranks = np.searchsorted(cdf, rng.random(size), side='right')
+    np.minimum(ranks, num_nodes - 1, out=ranks)
+    permutation = rng.permutation(num_nodes).astype(np.int32)
+    return permutation[ranks]
+
+
+def generate_graph(num_edges, num_nodes=None, alpha=1.1, max_relations_per_sent=4, seed=0):
+    """生成合成图谱
+
+    Args:
+        num_edges: 边（三元组）数量
+        num_nodes: 节点数量，默认为边数的1/4
+        alpha: 幂律指数，越大度数越集中在少数节点
+        max_relations_per_sent: 每个句子包含的最大三元组数
+        seed: 随机种子
+    """
+    num_nodes = num_nodes or max(2, num_edges // 4)
+    rng = np.random.default_rng(seed)
+
+    relations = load_schema_relations()
+    label_names = sorted({label for labels in relations.values() for label in labels})
+    label_index = {label: i for i, label in enumerate(label_names)}
+    type_labels = [np.array([label_index[l] for l in relations[etype]], dtype=np.int32) for etype in ENTITY_TYPES]
+
+    node_types = rng.choice(len(ENTITY_TYPES), size=num_nodes, p=TYPE_WEIGHTS).astype(np.int8)
+    names = _entity_names(node_types, np.random.default_rng(seed + 1))
+
+    sources = _power_law_nodes(rng, num_nodes, num_edges, alpha)
+    targets = _power_law_nodes(rng, num_nodes, num_edges, alpha)
+    # 去掉自环
+    loops = sources == targets
+    targets[loops] = (targets[loops] + 1) % num_nodes
+
+    # 关系标签按头实体类型从schema中抽取
+    labels = np.empty(num_edges, dtype=np.int32)
+    source_types = node_types[sources]
+    for t, candidates in enumerate(type_labels):
+        mask = source_types == t
+        labels[mask] = candidates[rng.integers(0, len(candidates), size=int(mask.sum()))]
+
+    # 把连续的边分组成句子
+    sent_sizes = rng.integers(1, max_relations_per_sent + 1, size=num_edges)
+    boundaries = np.cumsum(sent_sizes)
+    boundaries = boundaries[boundaries < num_edges]
+    sent_ids = np.zeros(num_edges, dtype=np.int32)
+    sent_ids[boundaries] = 1
+    sent_ids = np.cumsum(sent_ids, dtype=np.int32)
+
+    return SyntheticGraph(names, node_types, sources, targets, labels, label_names, sent_ids)
+
+
+# ===== 输出 =====
+
+def iter_spn_lines(graph):
+    """逐句产出SPN格式的记录"""
+    names, label_names = graph.names, graph.label_names
+    sources, targets, labels = graph.sources.tolist(), graph.targets.tolist(), graph.labels.tolist()
+    sent_ids = graph.sent_ids.tolist()
+
+    start = 0
+    while start < graph.num_edges:
+        sent_id = sent_ids[start]
+        end = start
+        parts, mentions, offset = [], [], 0
+        while end < graph.num_edges and sent_ids[end] == sent_id:
+            em1, em2, label = names[sources[end]], names[targets[end]], label_names[labels[end]]
+            clause = f"{em1}的{label}与{em2}相关，"
+            em1_start = offset
+            em2_start = offset + len(em1) + 1 + len(label) + 1
+            mentions.append({
+                "em1Text": em1, "em2Text": em2, "label": label,
+                "em1Start": em1_start, "em1End": em1_start + len(em1),
+                "em2Start": em2_start, "em2End": em2_start + len(em2),
+            })
+            parts.append(clause)
+            offset += len(clause)
+            end += 1
+        text = "".join(parts)
+        yield {"id": sent_id, "sentText": text[:-1] + "。", "relationMentions": mentions}
+        start = end
+
+
+def write_spn(graph, path):
+    """写出SPN风格的JSONL"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in iter_spn_lines(graph):
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def to_frontend(graph):
+    """转换为前端可视化格式（内存中的dict，适合中小规模）"""
+    degrees = graph.degrees().tolist()
+    node_types = graph.node_types.tolist()
+
+    nodes = []
+    for i, name in enumerate(graph.names):
+        symbol_size = max(8, min(50, degrees[i] * 3))
+        nodes.append({
+            "id": i,
+            "name": name,
+            "category": node_types[i],
+            "symbolSize": symbol_size,
+            "label": {"show": symbol_size > 20},
+        })
+
+    label_names = graph.label_names
+    links = [
+        {"source": s, "target": t, "name": label_names[l], "sent": sent}
+        for s, t, l, sent in zip(graph.sources.tolist(), graph.targets.tolist(),
+                                 graph.labels.tolist(), graph.sent_ids.tolist())
+    ]
+    sents = {str(line["id"]): line["sentText"] for line in iter_spn_lines(graph)}
+    categories = [{"name": etype} for etype in ENTITY_TYPES]
+    return {"nodes": nodes, "links": links, "sents": sents, "categories": categories}
+
+
+def write_frontend(graph, path):
+    """流式写出前端格式，避免在内存中构造千万级的dict"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    degrees = graph.degrees().tolist()
+    node_types = graph.node_types.tolist()
+    label_names = graph.label_names
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"nodes": [')
+        for i, name in enumerate(graph.names):
+            symbol_size = max(8, min(50, degrees[i] * 3))
+            node = {"id": i, "name": name, "category": node_types[i], "symbolSize": symbol_size,
+                    "label": {"show": symbol_size > 20}}
+            f.write(("," if i else "") + json.dumps(node, ensure_ascii=False))
+
+        f.write('], "links": [')
+        for i, (s, t, l, sent) in enumerate(zip(graph.sources.tolist(), graph.targets.tolist(),
+                                                 graph.labels.tolist(), graph.sent_ids.tolist())):
+            f.write(("," if i else "") + json.dumps(
+                {"source": s, "target": t, "name": label_names[l], "sent": sent}, ensure_ascii=False))
+
+        f.write('], "sents": {')
+        for i, line in enumerate(iter_spn_lines(graph)):
+            f.write(("," if i else "") + json.dumps(str(line["id"])) + ": "
+                    + json.dumps(line["sentText"], ensure_ascii=False))
+
+        f.write('}, "categories": ')
+        f.write(json.dumps([{"name": etype} for etype in ENTITY_TYPES], ensure_ascii=False))
+        f.write('}')
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="生成合成CCUS知识图谱")
+    parser.add_argument("--edges", type=int, default=10000, help="边（三元组）数量，10k ~ 10M")
+    parser.add_argument("--nodes", type=int, default=None, help="节点数量，默认为边数的1/4")
+    parser.add_argument("--alpha", type=float, default=1.1, help="度数分布的幂律指数")
+    parser.add_argument("--max-relations-per-sent", type=int, default=4, help="每个句子的最大三元组数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--spn-output", type=str, default=None, help="SPN风格JSONL输出路径")
+    parser.add_argument("--frontend-output", type=str, default=None, help="前端格式JSON输出路径")
+    return parser.parse_args()
+
+
+def main():
+    args = arg_parser()
+    if not args.spn_output and not args.frontend_output:
+        raise SystemExit("请至少指定 --spn-output 或 --frontend-output")
+
+    print(f"🚀 生成合成图谱: {args.edges} 条边, seed={args.seed}")
+    graph = generate_graph(args.edges, args.nodes, args.alpha, args.max_relations_per_sent, args.seed)
+    degrees = graph.degrees()
+    print(f"📊 节点: {graph.num_nodes}, 边: {graph.num_edges}, 句子: {graph.num_sents}, "
+          f"最大度数: {int(degrees.max())}, 平均度数: {degrees.mean():.2f}")
+
+    if args.spn_output:
+        write_spn(graph, args.spn_output)
+        print(f"✅ SPN格式已保存: {args.spn_output}")
+    if args.frontend_output:
+        write_frontend(graph, args.frontend_output)
+        print(f"✅ 前端格式已保存: {args.frontend_output}")
+
+
+if __name__ == "__main__":
+    main()
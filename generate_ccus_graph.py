@@ -9,6 +9,8 @@ import json
 import os
 from collections import defaultdict
 
+from modules.graph_analysis import add_layout, add_communities, add_stable_ids
+
 def load_ccus_data(file_path):
     """加载CCUS知识图谱数据"""
     data = []
@@ -189,6 +191,14 @@ def main():
     # 生成可视化数据
     visualization_data = create_visualization_data(entities, relations, entity_sentences, ccus_data)
 
+    # 预计算节点坐标，前端无需再做力导向布局
+    add_layout(visualization_data)
+    print(f"📐 已计算 {len(visualization_data['nodes'])} 个节点的布局坐标")
+    q = add_communities(visualization_data)
+    print(f"🧩 发现 {len(visualization_data['clusters'])} 个社区, 模块度 {q:.3f}")
+    # 稳定id，重新生成后客户端可以按版本增量更新
+    add_stable_ids(visualization_data)
+
     # 保存可视化数据
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(visualization_data, f, ensure_ascii=False, indent=2)
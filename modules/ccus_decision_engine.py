@@ -1,120 +1,678 @@
+import hashlib
 import json
 import numpy as np
 import os
-from typing import Dict, List, Tuple
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from modules.technology_features import extract_features, feature_columns, features_path, load_features
+
+
+# 长度不在该范围内的实体明显不是技术名称，不参与推荐
+MIN_TECH_NAME_LENGTH = 2
+MAX_TECH_NAME_LENGTH = 50
+
+# 技术特征矩阵的列，以及各列取值所依据的知识图谱关系
+FEATURES = ('maturity', 'cost_class', 'policy', 'geology')
+FEATURE_ATTRIBUTES = {
+    'maturity': ('技术成熟度', '发展阶段'),
+    'cost_class': ('投资成本', '投资规模', '运营成本'),
+    'policy': ('政策支持', '资金支持'),
+    'geology': ('地质条件', '地质结构', '封存潜力', '适用条件'),
+}
+INDUSTRY_ATTRIBUTES = ('适用行业', '产业结构')
+
+# 成熟度关键词 -> 等级，等级越高越成熟
+MATURITY_LEVELS = (('商业化', 3), ('成熟', 3), ('示范', 2), ('研发', 1))
+
+BASE_SCORE = 0.6
+MATURITY_BONUS = {3: 0.2, 2: 0.15, 1: 0.05}
+BUDGET_BONUS = {2: 0.1, 1: 0.05}
+# 技术缺少某项属性时该项加分的系数
+UNKNOWN_WEIGHT = 0.5
+# 知识图谱特征的加分权重：支撑句子数和PageRank按在全部候选技术中的百分位计，效率按解析出的数值计
+GRAPH_WEIGHTS = {'sentences': 0.05, 'pagerank': 0.05, 'efficiency': 0.05}
+# 批量推荐时一次计算的评分矩阵大小上限（条件数 x 技术数）
+BATCH_SCORE_CELLS = 4_000_000
+# 每个技术索引记住的地区产业 -> 匹配技术下标的条目数上限
+INDUSTRY_TERM_CACHE = 4096
+# 每个推荐结果附带的知识图谱依据（三元组及其来源句子）条数，以及句子截取的长度
+EVIDENCE_PER_RECOMMENDATION = 3
+EVIDENCE_SENTENCE_CHARS = 200
+# Pareto 排序的目标：适用性评分、技术成熟度、投资金额（越低越好）和效率，比较时都转换为越大越好，未知为 -inf；
+# cost 只取投资类属性解析出的总额，运营成本和每吨成本与之不可比，不参与比较
+PARETO_OBJECTIVES = ('applicability', 'maturity', 'cost', 'efficiency')
+
+
+def maturity_level(text: str) -> int:
+    """文本中成熟度关键词对应的最高等级，没有关键词时为0"""
+    return max((level for keyword, level in MATURITY_LEVELS if keyword in text), default=0)
+
+
+def budget_class(text: str) -> int:
+    """金额量级：亿元级为2，万元级为1，无法判断时为0"""
+    if "亿" in text:
+        return 2
+    if "万" in text:
+        return 1
+    return 0
+
+
+def _gate(known: np.ndarray, matched: np.ndarray) -> np.ndarray:
+    """属性匹配系数：已知且符合为1，已知但不符为0，未知为 UNKNOWN_WEIGHT"""
+    return np.where(known, matched.astype(np.float64), UNKNOWN_WEIGHT)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """分数最高的 k 个下标，按分数从高到低，同分时保持原有顺序（与稳定排序的结果一致）"""
+    n = len(scores)
+    if n > k > 0:
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.nonzero(scores > kth)[0]
+        ties = np.nonzero(scores == kth)[0][:k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(n if k > 0 else 0)
+    return selected[np.lexsort((selected, -scores[selected]))]
+
+
+def pareto_mask(points: np.ndarray) -> np.ndarray:
+    """points（各行互不相同，各列越大越好）中不被任何其他点支配的行
+
+    剩余点中各列名次之和最大的点一定不被支配：每次取出这样一个点，并整体删除它支配的所有点，
+    迭代次数等于前沿大小，每次的开销与剩余点数成正比，而不是两两比较
+    """
+    # 各列取值换成名次，-inf 也能参与求和
+    ranks = np.column_stack([np.unique(column, return_inverse=True)[1].reshape(-1) for column in points.T])
+    total = ranks.sum(axis=1)
+    keep = np.zeros(len(points), dtype=bool)
+    remaining = np.arange(len(points))
+    while len(remaining):
+        best = remaining[np.argmax(total[remaining])]
+        keep[best] = True
+        remaining = remaining[~(ranks[remaining] <= ranks[best]).all(axis=1)]
+    return keep
+
+
+def pareto_fronts(points: np.ndarray, count: int) -> List[np.ndarray]:
+    """非支配排序：依次剥离的各层前沿（行下标，升序），累计达到 count 行后停止
+
+    目标值相同的行属于同一层，先去重再排序，离散目标较多时需要比较的点数远少于行数
+    """
+    # 按列排序后去重（比 np.unique(axis=0) 的结构化排序快得多）
+    order = np.lexsort(points.T[::-1])
+    ordered = points[order]
+    first = np.ones(len(points), dtype=bool)
+    first[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    unique = ordered[first]
+    inverse = np.empty(len(points), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+    remaining = np.arange(len(unique))
+    fronts, total = [], 0
+    while len(remaining) and total < count:
+        mask = pareto_mask(unique[remaining])
+        members = np.flatnonzero(np.isin(inverse, remaining[mask]))
+        fronts.append(members)
+        total += len(members)
+        remaining = remaining[~mask]
+    return fronts
+
+
+def excerpt(sentence: str, value: str, limit: int = EVIDENCE_SENTENCE_CHARS) -> str:
+    """句子中以属性值所在位置为中心、不超过 limit 个字符的片段，找不到属性值时取开头"""
+    if len(sentence) <= limit:
+        return sentence
+    position = sentence.find(value)
+    if position < 0:
+        return sentence[:limit]
+    start = max(0, min(position - (limit - len(value)) // 2, len(sentence) - limit))
+    return sentence[start:start + limit]
+
+
+def resident_memory_mb() -> Optional[float]:
+    """当前进程的常驻内存（MB），无法获取时为 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # 峰值，Linux 下单位为KB
+    except ImportError:
+        return None
+
+
+class KnowledgeGraphTriples:
+    """流式加载的知识图谱关系三元组
+
+    逐行解析知识图谱文件（每行一个JSON），只保留 (头实体, 关系, 尾实体, 句子编号)：
+    字符串驻留后存入词表，三元组以 int32 数组存放；句子原文不常驻内存，需要时按行偏移从文件读取
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.strings: List[str] = []
+        self.version = ''
+        self.num_items = 0
+        self.file_stat = None
+        self._stale_warned = False
+        ids = {}
+        heads, labels, tails, sents = array('i'), array('i'), array('i'), array('i')
+        offsets = array('q')
+
+        def intern(text):
+            i = ids.get(text)
+            if i is None:
+                i = ids[text] = len(self.strings)
+                self.strings.append(sys.intern(text))
+            return i
+
+        start = time.perf_counter()
+        if not os.path.exists(path):
+            print(f"Warning: Knowledge graph file not found: {path}")
+        else:
+            try:
+                digest = hashlib.sha1()
+                offset = 0
+                with open(path, 'rb') as f:
+                    for line in f:
+                        digest.update(line)
+                        line_offset, offset = offset, offset + len(line)
+                        if not line.strip():
+                            continue
+                        sent_id = len(offsets)
+                        offsets.append(line_offset)
+                        for relation in json.loads(line).get('relationMentions', []):
+                            tech = relation.get('em1Text', '')
+                            attr = relation.get('label', '')
+                            value = relation.get('em2Text', '')
+                            if tech and attr and value:
+                                heads.append(intern(tech))
+                                labels.append(intern(attr))
+                                tails.append(intern(value))
+                                sents.append(sent_id)
+                    st = os.fstat(f.fileno())
+                    self.file_stat = (st.st_mtime_ns, st.st_size)
+                self.version = digest.hexdigest()[:16]
+            except Exception as e:
+                print(f"Error loading knowledge graph: {e}")
+                self.strings = []
+                heads, labels, tails, sents, offsets = array('i'), array('i'), array('i'), array('i'), array('q')
+
+        self.num_items = len(offsets)
+        self.heads = np.frombuffer(heads, dtype=np.int32) if heads else np.zeros(0, dtype=np.int32)
+        self.labels = np.frombuffer(labels, dtype=np.int32) if labels else np.zeros(0, dtype=np.int32)
+        self.tails = np.frombuffer(tails, dtype=np.int32) if tails else np.zeros(0, dtype=np.int32)
+        self.sents = np.frombuffer(sents, dtype=np.int32) if sents else np.zeros(0, dtype=np.int32)
+        self.offsets = np.frombuffer(offsets, dtype=np.int64) if offsets else np.zeros(0, dtype=np.int64)
+        self.load_seconds = time.perf_counter() - start
+
+    def __len__(self) -> int:
+        return len(self.heads)
+
+    def __iter__(self) -> Iterator[Tuple[str, str, str, int]]:
+        strings = self.strings
+        for h, l, t, s in zip(self.heads.tolist(), self.labels.tolist(), self.tails.tolist(), self.sents.tolist()):
+            yield strings[h], strings[l], strings[t], s
+
+    @property
+    def nbytes(self) -> int:
+        """三元组数组、行偏移和词表字符串占用的字节数（估算）"""
+        arrays = self.heads.nbytes + self.labels.nbytes + self.tails.nbytes + self.sents.nbytes + self.offsets.nbytes
+        return arrays + sum(sys.getsizeof(text) for text in self.strings)
+
+    def sentence(self, sent_id: int) -> str:
+        """按行偏移从文件中读取某个句子的原文"""
+        return self.sentences([sent_id])[0]
+
+    def sentences(self, sent_ids: List[int]) -> List[str]:
+        """按行偏移读取多个句子的原文，只打开一次文件，重复的句子只读一次；
+        文件在加载后被修改过时偏移已失效，返回空字符串并在第一次发现时给出警告
+        """
+        if not sent_ids:
+            return []
+        found = {}
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if (st.st_mtime_ns, st.st_size) != self.file_stat:
+                    if not self._stale_warned:
+                        self._stale_warned = True
+                        print(f"Warning: knowledge graph {self.path} changed since it was loaded, "
+                              f"evidence sentences are unavailable until it is reloaded")
+                    return [''] * len(sent_ids)
+                for sent_id in sorted(set(sent_ids)):
+                    if 0 <= sent_id < self.num_items:
+                        f.seek(int(self.offsets[sent_id]))
+                        found[sent_id] = json.loads(f.readline()).get('sentText', '')
+        except (OSError, ValueError):
+            pass
+        return [found.get(sent_id, '') for sent_id in sent_ids]
+
+
+class TechnologyIndex:
+    """知识图谱中技术信息的只读索引
+
+    每个知识图谱版本构建一次：技术 -> 属性 -> 属性值（按出现顺序，字符串驻留），
+    技术列表、统计信息，候选技术的特征矩阵和适用行业（CSR），用于约束过滤的倒排表，
+    离线提取的知识图谱特征（见 modules/technology_features.py），以及候选技术 -> 依据三元组的证据表（CSR），
+    请求只读取索引而不再遍历知识图谱
+    """
+
+    def __init__(self, triples: KnowledgeGraphTriples, graph_features_path: str = None):
+        start = time.perf_counter()
+        tech_info = {}
+
+        # 三元组中的字符串已经驻留，这里直接共用
+        for tech, attr, value, _ in triples:
+            attrs = tech_info.get(tech)
+            if attrs is None:
+                attrs = tech_info[tech] = {}
+            values = attrs.get(attr)
+            if values is None:
+                values = attrs[attr] = []
+            values.append(value)
+
+        # 属性值转为元组，索引构建完成后不再修改
+        self.tech_info = {tech: {attr: tuple(values) for attr, values in attrs.items()}
+                          for tech, attrs in tech_info.items()}
+        self.technologies = tuple(self.tech_info)
+        # 参与推荐的候选技术
+        candidates = [tech for tech in self.technologies
+                      if MIN_TECH_NAME_LENGTH <= len(tech) <= MAX_TECH_NAME_LENGTH]
+        self._load_graph_features(triples, graph_features_path, candidates)
+        self.position = {tech: i for i, tech in enumerate(self.candidates)}
+        self._build_features()
+        self._build_postings()
+        self._build_objectives()
+        self._build_evidence(triples)
+        self.statistics = {
+            "total_technologies": len(self.technologies),
+            "total_relations": sum(len(attrs) for attrs in self.tech_info.values()),
+            "total_triples": len(triples),
+            "candidate_technologies": len(self.candidates),
+            "knowledge_graph_size": triples.num_items,
+            "graph_features": self.graph_features_source,
+            "evidence_triples": len(self.evidence_triples),
+        }
+        self.build_seconds = time.perf_counter() - start
+
+    def _load_graph_features(self, triples: KnowledgeGraphTriples, path: str, candidates: List[str]):
+        """读取离线特征表，没有可用的特征表时在此提取一次
+
+        候选技术按支撑句子数、PageRank从高到低排列，评分相同时知识图谱中依据更充分的技术排在前面
+        """
+        columns = feature_columns({**FEATURE_ATTRIBUTES, 'industry': INDUSTRY_ATTRIBUTES})
+        table = load_features(path, triples.version, columns)
+        self.graph_features_source = 'offline'
+        if table is None:
+            table = extract_features(triples, {**FEATURE_ATTRIBUTES, 'industry': INDUSTRY_ATTRIBUTES})
+            self.graph_features_source = 'computed'
+        names, self.graph_columns, values = table
+
+        row_of = {name: i for i, name in enumerate(names)}
+        rows = np.array([row_of.get(tech, -1) for tech in candidates], dtype=np.int64)
+        graph_features = np.full((len(candidates), len(columns)), np.nan)
+        graph_features[rows >= 0] = values[rows[rows >= 0]]
+
+        sentences = np.nan_to_num(graph_features[:, columns.index('sentences')])
+        rank = np.nan_to_num(graph_features[:, columns.index('pagerank')])
+        order = np.lexsort((-rank, -sentences))
+        self.candidates = tuple(candidates[i] for i in order.tolist())
+        self.graph_features = graph_features[order]
+
+        # 与请求无关的知识图谱加分，每个候选技术一个值
+        n = len(self.candidates)
+        self.graph_score = np.zeros(n)
+        for name in ('sentences', 'pagerank'):
+            # 百分位为严格小于该值的技术所占比例，取值相同的技术百分位相同，与文件中的顺序无关
+            values = np.nan_to_num(self.graph_feature(name))
+            percentile = np.searchsorted(np.sort(values), values, 'left') / max(n - 1, 1)
+            self.graph_score += GRAPH_WEIGHTS[name] * percentile
+        efficiency = self.graph_feature('efficiency')
+        self.graph_score += GRAPH_WEIGHTS['efficiency'] * np.where(np.isnan(efficiency), UNKNOWN_WEIGHT, efficiency)
+
+    def graph_feature(self, name: str) -> np.ndarray:
+        """知识图谱特征表的一列"""
+        return self.graph_features[:, self.graph_columns.index(name)]
+
+    def _build_features(self):
+        """候选技术 x FEATURES 的特征矩阵，以及技术 -> 适用行业的稀疏表"""
+        features = np.zeros((len(self.candidates), len(FEATURES)), dtype=np.float32)
+        vocab = {}
+        industry_rows, industry_ids = [], []
+
+        for row, tech in enumerate(self.candidates):
+            attrs = self.tech_info[tech]
+            values = {name: [v for attr in attrs_of if attr in attrs for v in attrs[attr]]
+                      for name, attrs_of in FEATURE_ATTRIBUTES.items()}
+            features[row, 0] = max((maturity_level(v) for v in values['maturity']), default=0)
+            features[row, 1] = max((budget_class(v) for v in values['cost_class']), default=0)
+            features[row, 2] = len(values['policy'])
+            features[row, 3] = len(values['geology'])
+            for attr in INDUSTRY_ATTRIBUTES:
+                for value in attrs.get(attr, ()):
+                    industry_rows.append(row)
+                    industry_ids.append(vocab.setdefault(value, len(vocab)))
+
+        self.features = features
+        self.industry_vocab = tuple(vocab)
+        self.industry_rows = np.array(industry_rows, dtype=np.int64)
+        self.industry_ids = np.array(industry_ids, dtype=np.int64)
+
+    def _build_postings(self):
+        """约束过滤用的倒排表
+
+        成熟度要求、预算量级 -> 满足该要求的技术（属性未知或不矛盾）的位图，
+        适用行业 -> 技术下标（CSR，每个行业内升序）
+        """
+        n = len(self.candidates)
+        maturity = self.feature('maturity')
+        cost = self.feature('cost_class')
+        self.maturity_allowed = {level: (maturity == 0) | (maturity >= level) for level in MATURITY_BONUS}
+        self.budget_allowed = {level: (cost == 0) | (cost <= level) for level in BUDGET_BONUS}
+
+        pairs = np.unique(self.industry_ids * max(n, 1) + self.industry_rows)
+        self.industry_postings = pairs % max(n, 1)
+        self.industry_ptr = np.zeros(len(self.industry_vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs // max(n, 1), minlength=len(self.industry_vocab)), out=self.industry_ptr[1:])
+        self.has_industry = np.bincount(self.industry_rows, minlength=n) > 0
+        self._industry_terms = {}
+
+    def _build_objectives(self):
+        """与请求无关的 Pareto 目标（PARETO_OBJECTIVES 中除适用性评分外的各项），越大越好，未知为 -inf"""
+        maturity = self.feature('maturity').astype(np.float64)
+        # 没有可比的投资总额（只有运营成本、每吨成本或无法解析）的技术在 cost 上视为未知
+        cost = self.graph_feature('investment')
+        efficiency = self.graph_feature('efficiency')
+        self.objectives = np.column_stack([
+            np.where(maturity > 0, maturity, -np.inf),
+            np.where(np.isnan(cost), -np.inf, -cost),
+            np.where(np.isnan(efficiency), -np.inf, efficiency),
+        ])
+
+    def _build_evidence(self, triples: KnowledgeGraphTriples):
+        """候选技术 -> 依据三元组的下标（CSR）
+
+        同一技术相同的 (关系, 属性值) 只保留最早的一条，support 记录支撑它的三元组数；
+        每个技术内评分所用的属性排在前面，其次按 support 从高到低、在知识图谱中出现的先后
+        """
+        n = len(self.candidates)
+        heads = triples.heads.astype(np.int64)
+        labels = triples.labels.astype(np.int64)
+        tails = triples.tails.astype(np.int64)
+
+        row_of = np.full(len(triples.strings), -1, dtype=np.int64)
+        for h in np.unique(heads).tolist():
+            row_of[h] = self.position.get(triples.strings[h], -1)
+        rows = row_of[heads]
+        selected = np.flatnonzero(rows >= 0)
+
+        # 相同的 (技术, 关系, 属性值) 合并
+        order = np.lexsort((selected, tails[selected], labels[selected], rows[selected]))
+        ordered = selected[order]
+        first = np.ones(len(ordered), dtype=bool)
+        first[1:] = ((rows[ordered[1:]] != rows[ordered[:-1]]) | (labels[ordered[1:]] != labels[ordered[:-1]]) |
+                     (tails[ordered[1:]] != tails[ordered[:-1]]))
+        kept = ordered[first]
+        support = np.diff(np.append(np.flatnonzero(first), len(ordered)))
+
+        scored = {attr for attrs in FEATURE_ATTRIBUTES.values() for attr in attrs} | set(INDUSTRY_ATTRIBUTES)
+        label_ids = [i for i in np.unique(labels).tolist() if triples.strings[i] in scored]
+        priority = ~np.isin(labels[kept], label_ids)
+        order = np.lexsort((kept, -support, priority, rows[kept]))
+        self.evidence_triples = kept[order].astype(np.int32)
+        self.evidence_support = support[order].astype(np.int32)
+        self.evidence_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[kept], minlength=n), out=self.evidence_ptr[1:])
+
+    def evidence(self, tech: str, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """某个候选技术排在最前的 limit 条依据：(三元组下标, 支撑数)"""
+        row = self.position.get(tech)
+        if row is None:
+            return self.evidence_triples[:0], self.evidence_support[:0]
+        begin = self.evidence_ptr[row]
+        end = min(self.evidence_ptr[row + 1], begin + limit)
+        return self.evidence_triples[begin:end], self.evidence_support[begin:end]
+
+    def feature(self, name: str) -> np.ndarray:
+        """特征矩阵的一列"""
+        return self.features[:, FEATURES.index(name)]
+
+    def industry_term_rows(self, industry: str) -> np.ndarray:
+        """适用行业包含该产业的技术下标（升序）
+
+        产业按子串匹配行业词表（"钢铁" 匹配 "钢铁行业"），不能直接按词查倒排表，
+        因此每个产业第一次出现时扫描一遍词表并合并匹配到的倒排表，之后直接使用记下的结果
+        """
+        rows = self._industry_terms.get(industry)
+        if rows is None:
+            postings = [self.industry_postings[self.industry_ptr[v]:self.industry_ptr[v + 1]]
+                        for v, value in enumerate(self.industry_vocab) if industry in value]
+            rows = np.unique(np.concatenate(postings)) if postings else np.zeros(0, dtype=np.int64)
+            if len(self._industry_terms) < INDUSTRY_TERM_CACHE:
+                self._industry_terms[industry] = rows
+        return rows
+
+    def industry_mask(self, industries: Tuple[str, ...]) -> np.ndarray:
+        """适用行业包含 industries 中任一产业的技术位图"""
+        mask = np.zeros(len(self.candidates), dtype=bool)
+        for industry in industries:
+            mask[self.industry_term_rows(industry)] = True
+        return mask
+
+    def allowed(self, terms: Dict) -> np.ndarray:
+        """满足请求约束的候选技术下标（升序），没有约束时返回 None
+
+        技术的成熟度低于要求、投资量级超出预算或适用行业与地区产业不符时被排除，缺少相应属性的技术保留
+        """
+        masks = []
+        if terms['maturity']:
+            masks.append(self.maturity_allowed[terms['maturity']])
+        if terms['budget']:
+            masks.append(self.budget_allowed[terms['budget']])
+        if terms['industries'] is not None:
+            masks.append(~self.has_industry | self.industry_mask(terms['industries']))
+        if not masks:
+            return None
+        return np.flatnonzero(np.logical_and.reduce(masks))
+
+
+class RecommendationCache:
+    """推荐结果的有界LRU缓存，记录命中统计
+
+    缓存的推荐列表会被多个请求共享，调用方不应修改
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return value
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
 
 class CCUSDecisionEngine:
     """CCUS技术决策引擎"""
 
-    def __init__(self, knowledge_graph_path: str):
+    def __init__(self, knowledge_graph_path: str, cache_size: int = 1024):
         """初始化决策引擎
 
         Args:
             knowledge_graph_path: 知识图谱文件路径
+            cache_size: 推荐结果缓存的条目数，0表示不缓存
         """
         self.kg_path = knowledge_graph_path
-        self.kg_data = self.load_knowledge_graph()
+        self.cache = RecommendationCache(cache_size)
+        self.reload()
 
-    def load_knowledge_graph(self) -> List[Dict]:
-        """加载知识图谱数据"""
-        if not os.path.exists(self.kg_path):
-            print(f"Warning: Knowledge graph file not found: {self.kg_path}")
-            return []
+    def reload(self):
+        """重新加载知识图谱并重建技术索引"""
+        self.triples = self.load_knowledge_graph()
+        self.kg_version = self.triples.version
+        self.loaded_at = time.time()
+        self.tech_index = TechnologyIndex(self.triples, features_path(self.kg_path))
+        # 缓存键包含知识图谱版本，旧版本的结果不会再被命中
+        self.cache.clear()
+        self.load_stats = {
+            "load_seconds": round(self.triples.load_seconds, 3),
+            "index_seconds": round(self.tech_index.build_seconds, 3),
+            "triples_bytes": self.triples.nbytes,
+            "resident_memory_mb": resident_memory_mb(),
+        }
+        print(f"CCUS知识图谱加载完成: {len(self.triples)} 个三元组, 用时 {self.load_stats['load_seconds']}s, "
+              f"三元组占用 {self.load_stats['triples_bytes'] / (1 << 20):.1f}MB, "
+              f"进程内存 {self.load_stats['resident_memory_mb'] or 0:.0f}MB")
 
-        try:
-            with open(self.kg_path, 'r', encoding='utf-8') as f:
-                return [json.loads(line) for line in f.readlines()]
-        except Exception as e:
-            print(f"Error loading knowledge graph: {e}")
-            return []
+    def load_knowledge_graph(self) -> KnowledgeGraphTriples:
+        """流式加载知识图谱中的关系三元组"""
+        return KnowledgeGraphTriples(self.kg_path)
 
     def extract_technology_info(self) -> Dict:
-        """从知识图谱中提取技术信息"""
-        tech_info = {}
+        """技术信息：技术 -> 属性 -> 属性值列表（来自加载时构建的索引）"""
+        return self.tech_index.tech_info
 
-        for item in self.kg_data:
-            if 'relationMentions' not in item:
-                continue
+    @staticmethod
+    def scenario_terms(region_info: Dict, policy_context: Dict, preferences: Dict) -> Dict:
+        """从请求条件中解析出参与评分的各项：成熟度要求、预算量级、政策支持、地质条件和地区产业"""
+        for name, value in (('region_info', region_info), ('policy_context', policy_context),
+                            ('preferences', preferences)):
+            if not isinstance(value, dict):
+                raise ValueError(f"{name} 必须是对象")
 
-            for relation in item['relationMentions']:
-                tech = relation.get('em1Text', '')
-                attr = relation.get('label', '')
-                value = relation.get('em2Text', '')
+        terms = {'maturity': 0, 'budget': 0, 'policy': False, 'geology': False, 'industries': None}
+        if "技术成熟度" in preferences:
+            terms['maturity'] = maturity_level(str(preferences["技术成熟度"]))
+        if "投资预算" in preferences:
+            terms['budget'] = budget_class(str(preferences["投资预算"]))
+        terms['policy'] = "政策支持" in policy_context
+        if "地质条件" in region_info:
+            geo_condition = str(region_info["地质条件"])
+            terms['geology'] = "适合" in geo_condition or "良好" in geo_condition
+        # 地区产业与期望行业有交集时才计算行业匹配度
+        if "主要产业" in region_info and "适用行业" in preferences:
+            industries = region_info["主要产业"]
+            industries = [industries] if isinstance(industries, str) else [str(i) for i in industries]
+            if any(industry in str(preferences["适用行业"]) for industry in industries):
+                terms['industries'] = tuple(sorted(set(industries)))
+        return terms
 
-                if not tech or not attr or not value:
-                    continue
+    def score_scenarios(self, scenarios: List[Dict], rows: np.ndarray = None) -> np.ndarray:
+        """多组条件（scenario_terms 的结果）下候选技术的适用性评分矩阵，形状为 (条件数, 技术数)
+
+        每一项条件的加分乘以技术自身属性的匹配系数：属性符合时为1，技术缺少该属性时为 UNKNOWN_WEIGHT，
+        属性与条件矛盾（成熟度低于要求、投资规模超出预算、适用行业不符）时为0；
+        另加与请求无关的知识图谱加分（支撑句子数、PageRank和效率，见 GRAPH_WEIGHTS）
+        """
+        index = self.tech_index
+        rows = np.arange(len(index.candidates)) if rows is None else np.asarray(rows)
+        score = np.full((len(scenarios), len(rows)), BASE_SCORE) + index.graph_score[rows]
+
+        # 技术成熟度、投资预算：每个要求等级对应一行匹配系数，按各条件的等级取行
+        maturity = index.feature('maturity')[rows]
+        required = np.array([t['maturity'] for t in scenarios], dtype=np.int64)
+        gates = np.stack([np.zeros(len(rows))] + [_gate(maturity > 0, maturity >= level) for level in (1, 2, 3)])
+        bonus = np.array([MATURITY_BONUS.get(level, 0.0) for level in required.tolist()])
+        score += bonus[:, None] * gates[required]
+
+        cost = index.feature('cost_class')[rows]
+        budget = np.array([t['budget'] for t in scenarios], dtype=np.int64)
+        gates = np.stack([np.zeros(len(rows))] + [_gate(cost > 0, cost <= level) for level in (1, 2)])
+        bonus = np.array([BUDGET_BONUS.get(level, 0.0) for level in budget.tolist()])
+        score += bonus[:, None] * gates[budget]
 
-                if tech not in tech_info:
-                    tech_info[tech] = {}
+        # 政策支持度、地区适配度
+        supported = index.feature('policy')[rows] > 0
+        policy = np.array([t['policy'] for t in scenarios], dtype=np.float64)
+        score += 0.1 * policy[:, None] * _gate(supported, supported)
 
-                if attr not in tech_info[tech]:
-                    tech_info[tech][attr] = []
+        described = index.feature('geology')[rows] > 0
+        geology = np.array([t['geology'] for t in scenarios], dtype=np.float64)
+        score += 0.1 * geology[:, None] * _gate(described, described)
+
+        # 行业匹配度：相同的地区产业只计算一次
+        industry_gates = {}
+        for s, terms in enumerate(scenarios):
+            industries = terms['industries']
+            if industries is None:
+                continue
+            if industries not in industry_gates:
+                industry_gates[industries] = _gate(index.has_industry[rows], index.industry_mask(industries)[rows])
+            score[s] += 0.05 * industry_gates[industries]
 
-                tech_info[tech][attr].append(value)
+        return np.minimum(score, 1.0)
 
-        return tech_info
+    def score_technologies(self,
+                           region_info: Dict,
+                           policy_context: Dict,
+                           preferences: Dict,
+                           rows: np.ndarray = None) -> np.ndarray:
+        """候选技术的适用性评分向量，rows 为空时对全部候选技术评分"""
+        terms = self.scenario_terms(region_info, policy_context, preferences)
+        return self.score_scenarios([terms], rows)[0]
 
     def calculate_suitability_score(self,
                                   technology: str,
                                   region_info: Dict,
                                   policy_context: Dict,
                                   preferences: Dict) -> float:
-        """计算技术适用性评分"""
-
-        # 基础分
-        base_score = 0.6
-
-        # 技术成熟度加分
-        if "技术成熟度" in preferences:
-            maturity = preferences["技术成熟度"]
-            if "商业化" in maturity or "成熟" in maturity:
-                base_score += 0.2
-            elif "示范" in maturity:
-                base_score += 0.15
-            elif "研发" in maturity:
-                base_score += 0.05
-
-        # 投资预算匹配度
-        if "投资预算" in preferences:
-            budget = preferences["投资预算"]
-            # 简化的预算匹配逻辑
-            if "亿" in budget:
-                base_score += 0.1
-            elif "万" in budget:
-                base_score += 0.05
-
-        # 政策支持度
-        if "政策支持" in policy_context:
-            base_score += 0.1
-
-        # 地区适配度
-        if "地质条件" in region_info:
-            geo_condition = region_info["地质条件"]
-            if "适合" in geo_condition or "良好" in geo_condition:
-                base_score += 0.1
-
-        # 行业匹配度
-        if "主要产业" in region_info and "适用行业" in preferences:
-            industries = region_info["主要产业"]
-            target_industries = preferences["适用行业"]
-            # 检查行业匹配度
-            for industry in industries:
-                if industry in str(target_industries):
-                    base_score += 0.05
-                    break
-
-        return min(base_score, 1.0)
+        """计算单个技术的适用性评分"""
+        row = self.tech_index.position.get(technology)
+        if row is None:
+            return 0.0
+        return float(self.score_technologies(region_info, policy_context, preferences, rows=[row])[0])
 
     def recommend_technologies(self,
                              region_info: Dict,
                              policy_context: Dict,
-                             preferences: Dict) -> List[Dict]:
+                             preferences: Dict,
+                             limit: int = 5) -> List[Dict]:
         """推荐CCUS技术方案"""
 
-        tech_info = self.extract_technology_info()
-        recommendations = []
-
-        if not tech_info:
+        index = self.tech_index
+        if not index.tech_info:
             return [{
                 "technology_name": "暂无技术数据",
                 "suitability_score": 0.0,
@@ -122,30 +680,226 @@ class CCUSDecisionEngine:
                 "reasons": ["知识图谱尚未构建完成，请先运行UIE抽取和SPN4RE训练"]
             }]
 
-        for tech_name, tech_attrs in tech_info.items():
-            # 过滤掉明显不是技术名称的实体
-            if len(tech_name) > 50 or len(tech_name) < 2:
-                continue
+        # 没有候选技术时返回示例
+        if not index.candidates:
+            return self._get_demo_recommendations()
 
-            score = self.calculate_suitability_score(
-                tech_name, region_info, policy_context, preferences
-            )
+        # 推荐结果只取决于解析后的评分条件，相同条件直接使用缓存
+        terms = self.scenario_terms(region_info, policy_context, preferences)
+        key = self._cache_key(terms, limit)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        rows = self._candidate_rows(terms)
+        scores = self.score_scenarios([terms], rows)[0]
+        return self.cache.put(key, self._top_recommendations(scores, limit, rows))
 
-            recommendations.append({
-                "technology_name": tech_name,
-                "suitability_score": round(score, 2),
-                "attributes": tech_attrs,
-                "reasons": self.generate_reasons(tech_name, tech_attrs, score)
-            })
+    def _candidate_rows(self, terms: Dict) -> np.ndarray:
+        """先用倒排表按约束过滤，只对剩下的技术评分；没有约束或没有技术满足全部约束时对全部候选技术评分"""
+        rows = self.tech_index.allowed(terms)
+        return rows if rows is not None and len(rows) else None
 
-        # 按适用性评分排序
-        recommendations.sort(key=lambda x: x['suitability_score'], reverse=True)
+    def _cache_key(self, terms: Dict, limit: int) -> Tuple:
+        """规范化的缓存键：知识图谱版本、返回数量和按固定顺序排列的评分条件"""
+        return (self.kg_version, limit) + tuple(terms[name] for name in sorted(terms))
 
-        # 返回前5个推荐，如果没有数据则返回示例
-        if not recommendations:
-            return self._get_demo_recommendations()
+    def _top_recommendations(self, scores: np.ndarray, limit: int, rows: np.ndarray = None,
+                             evidence: bool = True) -> List[Dict]:
+        """按保留两位小数后的评分选出前 limit 个，只为返回的技术生成推荐理由
+
+        rows 为 scores 对应的候选技术下标，为空时 scores 覆盖全部候选技术；分数为 -inf 的技术已被约束排除；
+        evidence 为 False 时由调用方之后统一调用 _attach_evidence
+        """
+        index = self.tech_index
+        scores = np.round(scores, 2)
+        recommendations = []
+        for position in top_k(scores, limit).tolist():
+            if scores[position] == -np.inf:
+                break
+            tech_name = index.candidates[position if rows is None else int(rows[position])]
+            recommendations.append(self._recommendation(tech_name, float(scores[position])))
+        if evidence:
+            self._attach_evidence(recommendations)
+        return recommendations
+
+    def _recommendation(self, tech_name: str, score: float) -> Dict:
+        tech_attrs = self.tech_index.tech_info[tech_name]
+        return {
+            "technology_name": tech_name,
+            "suitability_score": score,
+            "attributes": tech_attrs,
+            "reasons": self.generate_reasons(tech_name, tech_attrs, score),
+        }
+
+    def _attach_evidence(self, recommendations: List[Dict]):
+        """为一组推荐结果填入 evidence，来源句子一次读取"""
+        evidence = self.collect_evidence_for([r["technology_name"] for r in recommendations])
+        for recommendation, items in zip(recommendations, evidence):
+            recommendation["evidence"] = items
 
-        return recommendations[:5]
+    def collect_evidence(self, tech_name: str, limit: int = EVIDENCE_PER_RECOMMENDATION) -> List[Dict]:
+        """技术的知识图谱依据：关系、属性值、支撑数和来源句子，按加载时建好的证据表直接读取前 limit 条"""
+        return self.collect_evidence_for([tech_name], limit)[0]
+
+    def collect_evidence_for(self, tech_names: List[str],
+                             limit: int = EVIDENCE_PER_RECOMMENDATION) -> List[List[Dict]]:
+        """多个技术各自的依据（见 collect_evidence），全部来源句子只打开一次知识图谱文件读取"""
+        triples = self.triples
+        found = [self.tech_index.evidence(tech_name, limit) for tech_name in tech_names]
+        sentences = triples.sentences(triples.sents[np.concatenate([indices for indices, _ in found])].tolist()
+                                      if found else [])
+        evidence = []
+        begin = 0
+        for indices, support in found:
+            texts = sentences[begin:begin + len(indices)]
+            begin += len(indices)
+            evidence.append([{
+                "relation": triples.strings[label],
+                "value": triples.strings[tail],
+                "support": count,
+                "sent_id": sent_id,
+                "sentence": excerpt(sentence, triples.strings[tail])
+            } for label, tail, count, sent_id, sentence in zip(triples.labels[indices].tolist(),
+                                                              triples.tails[indices].tolist(), support.tolist(),
+                                                              triples.sents[indices].tolist(), texts)])
+        return evidence
+
+    def recommend_pareto(self,
+                         region_info: Dict,
+                         policy_context: Dict,
+                         preferences: Dict,
+                         limit: int = 5) -> Dict:
+        """按多个目标（PARETO_OBJECTIVES）的 Pareto 前沿推荐CCUS技术
+
+        推荐结果按前沿层级排列，同一层内按适用性评分从高到低，每项附带所在层级和各目标的取值；
+        best_by_objective 为每个目标单独排序的前 limit 个技术
+        """
+        index = self.tech_index
+        if not index.tech_info or not index.candidates:
+            return {"recommendations": self.recommend_technologies(region_info, policy_context, preferences, limit),
+                    "front_size": 0, "best_by_objective": {}}
+
+        terms = self.scenario_terms(region_info, policy_context, preferences)
+        key = self._cache_key(terms, limit) + ('pareto',)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        rows = self._candidate_rows(terms)
+        rows = np.arange(len(index.candidates)) if rows is None else rows
+        scores = np.round(self.score_scenarios([terms], rows)[0], 2)
+        points = np.column_stack([scores, index.objectives[rows]])
+
+        recommendations = []
+        fronts = pareto_fronts(points, limit)
+        for rank, members in enumerate(fronts, 1):
+            for position in members[np.lexsort((members, -scores[members]))].tolist():
+                if len(recommendations) >= limit:
+                    break
+                recommendation = self._recommendation(index.candidates[int(rows[position])], float(scores[position]))
+                recommendation["pareto_rank"] = rank
+                recommendation["objectives"] = self._objective_values(points[position])
+                recommendations.append(recommendation)
+        self._attach_evidence(recommendations)
+
+        best_by_objective = {}
+        for k, objective in enumerate(PARETO_OBJECTIVES):
+            known = np.flatnonzero(points[:, k] > -np.inf)
+            best = known[np.lexsort((known, -scores[known], -points[known, k]))[:limit]]
+            best_by_objective[objective] = [{
+                "technology_name": index.candidates[int(rows[position])],
+                "suitability_score": float(scores[position]),
+                "value": self._objective_values(points[position])[objective],
+            } for position in best.tolist()]
+
+        return self.cache.put(key, {"recommendations": recommendations,
+                                    "front_size": len(fronts[0]) if fronts else 0,
+                                    "best_by_objective": best_by_objective})
+
+    @staticmethod
+    def _objective_values(point: np.ndarray) -> Dict:
+        """比较用的目标值还原为原始含义：成熟度等级、投资金额（元）和效率，未知为 None"""
+        values = {}
+        for objective, value in zip(PARETO_OBJECTIVES, point.tolist()):
+            if value == -np.inf:
+                values[objective] = None
+            elif objective == 'maturity':
+                values[objective] = int(value)
+            elif objective == 'cost':
+                values[objective] = -value
+            else:
+                values[objective] = round(value, 4)
+        return values
+
+    def recommend_batch(self, scenarios: List[Dict], limit: int = 5) -> Iterator[Dict]:
+        """批量推荐：scenarios 中每一项为 {region_info, policy_context, preferences}，按顺序逐个产出结果
+
+        缓存未命中的条件分块组成评分矩阵一起计算，某一项条件不合法时只有该项返回错误
+        """
+        index = self.tech_index
+        chunk = max(1, BATCH_SCORE_CELLS // max(1, len(index.candidates)))
+        for begin in range(0, len(scenarios), chunk):
+            parsed = []
+            for i, scenario in enumerate(scenarios[begin:begin + chunk], begin):
+                try:
+                    if not isinstance(scenario, dict):
+                        raise ValueError("条件必须是对象")
+                    parsed.append((i, scenario, self.scenario_terms(scenario.get('region_info', {}),
+                                                                    scenario.get('policy_context', {}),
+                                                                    scenario.get('preferences', {}))))
+                except (ValueError, TypeError) as e:
+                    parsed.append((i, scenario, e))
+
+            # 先查缓存，同一块内相同的条件只计算一次
+            results = {}
+            missing = {}
+            for _, _, terms in parsed:
+                if isinstance(terms, dict):
+                    key = self._cache_key(terms, limit)
+                    if key not in results and key not in missing:
+                        cached = self.cache.get(key)
+                        if cached is not None:
+                            results[key] = cached
+                        else:
+                            missing[key] = terms
+            if missing:
+                if index.candidates:
+                    # 只对满足至少一个条件约束的技术评分，再把各条件各自排除的技术置为 -inf
+                    allowed = [self._candidate_rows(terms) for terms in missing.values()]
+                    rows = None
+                    if all(r is not None for r in allowed):
+                        rows = np.unique(np.concatenate(allowed))
+                    scores = self.score_scenarios(list(missing.values()), rows)
+                    if rows is not None:
+                        for s, r in enumerate(allowed):
+                            keep = np.zeros(len(rows), dtype=bool)
+                            keep[np.searchsorted(rows, r)] = True
+                            scores[s, ~keep] = -np.inf
+                    else:
+                        for s, r in enumerate(allowed):
+                            if r is not None:
+                                keep = np.zeros(len(index.candidates), dtype=bool)
+                                keep[r] = True
+                                scores[s, ~keep] = -np.inf
+                    # 整块新算出的推荐结果一起读取依据句子，之后再放入缓存
+                    computed = {key: self._top_recommendations(row, limit, rows, evidence=False)
+                                for key, row in zip(missing, scores)}
+                    self._attach_evidence([r for recommendations in computed.values() for r in recommendations])
+                    for key, recommendations in computed.items():
+                        results[key] = self.cache.put(key, recommendations)
+                else:
+                    fallback = self.recommend_technologies({}, {}, {}, limit)
+                    results.update(dict.fromkeys(missing, fallback))
+
+            for i, scenario, terms in parsed:
+                if not isinstance(terms, dict):
+                    yield {"index": i, "status": "error", "error": f"条件不合法: {terms}"}
+                    continue
+                recommendations = results[self._cache_key(terms, limit)]
+                result = {"index": i, "status": "success", "recommendations": recommendations,
+                          "total_count": len(recommendations)}
+                if 'id' in scenario:
+                    result['id'] = scenario['id']
+                yield result
 
     def generate_reasons(self, tech_name: str, attributes: Dict, score: float) -> List[str]:
         """生成推荐理由"""
@@ -210,11 +964,138 @@ class CCUSDecisionEngine:
         }]
 
     def get_technology_statistics(self) -> Dict:
-        """获取技术统计信息"""
-        tech_info = self.extract_technology_info()
+        """获取技术统计信息（加载时预先计算）"""
+        return dict(self.tech_index.statistics, kg_version=self.kg_version, cache=self.cache.stats(),
+                    load=self.load_stats)
+
+
+class DecisionEngineRegistry:
+    """多个知识图谱版本的决策引擎
 
+    每个版本对应一个独立构建、之后不再修改的决策引擎。发现新的知识图谱文件时在后台线程中加载并建好索引，
+    完成后通过一次引用赋值原子地切换为当前版本，正在处理的请求继续使用它开始时取得的引擎；
+    最近的 keep 个版本保留在内存中，请求可以按版本号指定其中任一版本
+    """
+
+    def __init__(self, candidate_paths: Callable[[], List[str]], keep: int = 3, cache_size: int = 1024):
+        """
+        Args:
+            candidate_paths: 返回按优先级排列的候选知识图谱路径，使用其中第一个存在的文件
+            keep: 内存中保留的版本数
+            cache_size: 每个版本的推荐结果缓存条目数
+        """
+        self.candidate_paths = candidate_paths
+        self.keep = keep
+        self.cache_size = cache_size
+        self._engines = OrderedDict()   # 版本 -> 引擎，最近加载的在最后
+        self._current = None
+        self._lock = threading.Lock()
+        self._loading = None            # 正在后台加载的路径
+        self._loaded_stat = None        # 当前版本文件的 (路径, 修改时间, 大小)
+        self._pending_stat = None       # 上一次检查时看到的新文件，两次检查间没有变化才加载
+        self.last_error = None
+
+    @property
+    def current(self) -> Optional[CCUSDecisionEngine]:
+        return self._current
+
+    def get(self, version: str = None) -> Optional[CCUSDecisionEngine]:
+        """指定版本的引擎，version 为空时返回当前版本，版本不存在时返回 None"""
+        if not version:
+            return self._current
+        return self._engines.get(version)
+
+    def versions(self) -> List[Dict]:
+        current = self._current
+        return [{
+            "kg_version": version,
+            "path": engine.kg_path,
+            "loaded_at": engine.loaded_at,
+            "current": engine is current,
+            "total_technologies": engine.tech_index.statistics["total_technologies"],
+            "load": engine.load_stats,
+        } for version, engine in reversed(list(self._engines.items()))]
+
+    def status(self) -> Dict:
+        with self._lock:
+            loading, last_error = self._loading, self.last_error
         return {
-            "total_technologies": len(tech_info),
-            "total_relations": sum(len(attrs) for attrs in tech_info.values()),
-            "knowledge_graph_size": len(self.kg_data)
-        }
\ No newline at end of file
+            "current": self._current.kg_version if self._current else None,
+            "loading": loading,
+            "last_error": last_error,
+            "versions": self.versions(),
+        }
+
+    def locate(self) -> Optional[str]:
+        for path in self.candidate_paths():
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return path, st.st_mtime_ns, st.st_size
+
+    def load(self, path: str) -> CCUSDecisionEngine:
+        """同步加载并切换为当前版本"""
+        stat = self._stat(path)
+        engine = CCUSDecisionEngine(path, cache_size=self.cache_size)
+        with self._lock:
+            self._engines.pop(engine.kg_version, None)
+            self._engines[engine.kg_version] = engine
+            self._current = engine
+            self._loaded_stat = stat
+            while len(self._engines) > self.keep:
+                self._engines.popitem(last=False)
+        return engine
+
+    def check_for_updates(self, force: bool = False) -> bool:
+        """候选路径中出现新的或有变化的知识图谱文件时在后台加载，返回是否开始了加载
+
+        文件可能仍在写入，默认要求两次检查之间文件没有变化；force 为真时立即加载
+        """
+        path = self.locate()
+        stat = self._stat(path) if path else None
+        if stat is None or stat == self._loaded_stat:
+            return False
+        if not force and stat != self._pending_stat:
+            self._pending_stat = stat
+            return False
+
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = path
+        threading.Thread(target=self._load_in_background, args=(path,), daemon=True,
+                         name='kg-version-loader').start()
+        return True
+
+    def _load_in_background(self, path: str):
+        error = None
+        try:
+            engine = self.load(path)
+            print(f"CCUS决策引擎切换到知识图谱版本 {engine.kg_version}: {path}")
+        except Exception as e:
+            error = f"{path}: {e}"
+            print(f"Error loading knowledge graph version: {error}")
+        finally:
+            # 加载状态和错误一起更新，status() 不会看到加载已结束但错误还未记录的中间状态
+            with self._lock:
+                self.last_error = error
+                self._loading = None
+
+    def start_watcher(self, interval: float):
+        """每隔 interval 秒检查一次知识图谱文件"""
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    print(f"Error checking knowledge graph updates: {e}")
+
+        threading.Thread(target=watch, daemon=True, name='kg-version-watcher').start()
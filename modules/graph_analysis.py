@@ -0,0 +1,367 @@
+"""
+知识图谱的离线分析
+在图谱构建完成后对前端格式的图谱 {nodes, links, sents, categories} 做一次性的预计算，
+结果直接写回图谱文件，服务端和前端加载时无需再计算：
+- 布局：numpy向量化的力导向布局，为每个节点写入 x/y 坐标
+- 社区：CSR邻接表上的标签传播社区发现，为每个节点写入 cluster，并生成各社区的规模和核心实体
+- 稳定id：由实体名称和三元组内容生成的 uid，图谱重新构建后不变，用于版本之间的增量比较
+
+用法: python -m modules.graph_analysis data/ccus_data.json [--output out.json] [--iterations 100]
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 节点数不超过该值时计算精确的两两斥力，否则使用多层网格近似
+EXACT_REPULSION_MAX_NODES = 2000
+# 多层网格近似：格子内节点数不超过 LEAF_SIZE 时停止细分，最多细分 MAX_TREE_LEVEL 层
+LEAF_SIZE = 8
+MAX_TREE_LEVEL = 20
+# 输出坐标的范围 [-LAYOUT_EXTENT, LAYOUT_EXTENT]
+LAYOUT_EXTENT = 1000.0
+
+
+def edge_arrays(data: Dict) -> Tuple[int, np.ndarray, np.ndarray]:
+    """节点数以及每条边两端节点的下标，忽略端点不存在的边"""
+    nodes = data.get('nodes', [])
+    id_to_index = {node['id']: i for i, node in enumerate(nodes)}
+    pairs = [(id_to_index[link['source']], id_to_index[link['target']])
+             for link in data.get('links', [])
+             if link['source'] in id_to_index and link['target'] in id_to_index]
+    edges = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return len(nodes), edges[:, 0], edges[:, 1]
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _sentence(sents, sent) -> str:
+    """sents 可能是以字符串为键的dict（前端格式）或list（SPN转换结果）"""
+    if isinstance(sents, dict):
+        return sents.get(str(sent), '')
+    if isinstance(sent, int) and 0 <= sent < len(sents):
+        return sents[sent]
+    return ''
+
+
+def stable_ids(data: Dict) -> Tuple[List[str], List[str]]:
+    """节点和边的稳定id，只取决于实体名称、关系和来源句子，与节点在文件中的顺序无关
+
+    节点 uid 由名称生成，边 uid 由 (头实体, 关系, 尾实体, 句子) 生成，内容完全相同的重复项依次加序号
+    """
+    nodes = data.get('nodes', [])
+    names = {node['id']: node.get('name', '').strip() for node in nodes}
+    sents = data.get('sents', {})
+
+    def unique(uids):
+        counts = Counter()
+        result = []
+        for uid in uids:
+            result.append(f"{uid}.{counts[uid]}" if counts[uid] else uid)
+            counts[uid] += 1
+        return result
+
+    node_uids = unique('n' + _digest(names[node['id']]) for node in nodes)
+    link_uids = unique('e' + _digest(names.get(link['source'], ''), link.get('name', ''),
+                                     names.get(link['target'], ''), _sentence(sents, link.get('sent')).strip())
+                       for link in data.get('links', []))
+    return node_uids, link_uids
+
+
+def add_stable_ids(data: Dict) -> Dict:
+    """把稳定id写入每个节点和边的 uid"""
+    node_uids, link_uids = stable_ids(data)
+    for node, uid in zip(data.get('nodes', []), node_uids):
+        node['uid'] = uid
+    for link, uid in zip(data.get('links', []), link_uids):
+        link['uid'] = uid
+    return data
+
+
+def csr_adjacency(num_nodes: int, sources: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """无向CSR邻接表 (indptr, indices)，去掉自环，重复边保留为多条"""
+    keep = sources != targets
+    rows = np.concatenate([sources[keep], targets[keep]])
+    cols = np.concatenate([targets[keep], sources[keep]])
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return indptr, cols[order]
+
+
+def pagerank(indptr: np.ndarray, indices: np.ndarray, n: int, damping: float = 0.85,
+             tol: float = 1e-8, max_iter: int = 100) -> np.ndarray:
+    """CSR邻接表上的幂迭代PageRank，孤立节点的分数均匀分给所有节点"""
+    if n == 0:
+        return np.zeros(0)
+    out_degree = np.diff(indptr).astype(np.float64)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    dangling = out_degree == 0
+    safe_degree = np.where(dangling, 1.0, out_degree)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        share = rank / safe_degree
+        new_rank = np.bincount(indices, weights=share[rows], minlength=n)
+        new_rank = damping * (new_rank + rank[dangling].sum() / n) + (1.0 - damping) / n
+        if np.abs(new_rank - rank).sum() < tol:
+            return new_rank
+        rank = new_rank
+    return rank
+
+
+def label_propagation(indptr: np.ndarray, indices: np.ndarray, max_iter: int = 100, seed: int = 0) -> np.ndarray:
+    """向量化的标签传播社区发现，返回按社区规模从大到小编号的社区id
+
+    每轮统计每个节点邻居的标签，当前标签不是最多票的节点以 1/2 的概率改为票数最多的标签，
+    半同步更新避免二部结构上的来回振荡，票数相同时随机选择；所有节点都满足时停止，孤立节点自成一个社区
+    """
+    n = len(indptr) - 1
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    labels = np.arange(n)
+
+    for _ in range(max_iter):
+        keys, votes = np.unique(rows * n + labels[indices], return_counts=True)
+        key_node, key_label = keys // n, keys % n
+        order = np.lexsort((-(votes + rng.random(len(votes)) * 0.5), key_node))
+        first = order[np.concatenate([[True], key_node[order][1:] != key_node[order][:-1]])]
+        best = labels.copy()
+        best[key_node[first]] = key_label[first]
+        max_votes = np.zeros(n, dtype=np.int64)
+        max_votes[key_node[first]] = votes[first]
+        own_keys = np.arange(n) * n + labels
+        position = np.minimum(np.searchsorted(keys, own_keys), len(keys) - 1)
+        own_votes = np.where(keys[position] == own_keys, votes[position], 0)
+
+        unsatisfied = own_votes < max_votes
+        if not unsatisfied.any():
+            break
+        update = unsatisfied & (rng.random(n) < 0.5)
+        labels[update] = best[update]
+
+    # 按社区规模从大到小重新编号
+    _, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+    return rank[inverse]
+
+
+def modularity(indptr: np.ndarray, indices: np.ndarray, labels: np.ndarray) -> float:
+    """社区划分的模块度 Q"""
+    total = len(indices)
+    if total == 0:
+        return 0.0
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    inside = np.count_nonzero(labels[rows] == labels[indices]) / total
+    degree_sum = np.bincount(labels, weights=np.diff(indptr).astype(np.float64))
+    return float(inside - ((degree_sum / total) ** 2).sum())
+
+
+def cluster_summaries(labels: np.ndarray, degree: np.ndarray, names: List[str], top: int = 5) -> List[Dict]:
+    """每个社区的规模和度数最高的若干实体，社区以其中度数最高的实体命名"""
+    order = np.lexsort((-degree, labels))
+    sizes = np.bincount(labels)
+    starts = np.cumsum(sizes) - sizes
+    summaries = []
+    for cluster_id, (start, size) in enumerate(zip(starts.tolist(), sizes.tolist())):
+        members = order[start:start + min(size, top)].tolist()
+        top_entities = [names[i] for i in members]
+        summaries.append({
+            'id': cluster_id,
+            'name': top_entities[0] if top_entities else str(cluster_id),
+            'size': size,
+            'top_entities': top_entities,
+        })
+    return summaries
+
+
+def add_communities(data: Dict, top: int = 5, seed: int = 0) -> float:
+    """社区发现，把社区id写入每个节点的 cluster，社区摘要写入 data['clusters']，返回模块度"""
+    num_nodes, sources, targets = edge_arrays(data)
+    indptr, indices = csr_adjacency(num_nodes, sources, targets)
+    labels = label_propagation(indptr, indices, seed=seed)
+    nodes = data.get('nodes', [])
+    for node, cluster_id in zip(nodes, labels.tolist()):
+        node['cluster'] = cluster_id
+    data['clusters'] = cluster_summaries(labels, np.diff(indptr), [node.get('name', '') for node in nodes], top)
+    return modularity(indptr, indices, labels)
+
+
+def _repulsion(pos: np.ndarray, others: np.ndarray, k2: float, weights: Optional[np.ndarray] = None,
+               chunk: int = 512) -> np.ndarray:
+    """others 中各点对 pos 中各点的斥力 k²·w/d 之和，按块计算以限制内存；重合的点之间没有斥力"""
+    ox, oy = others[:, 0], others[:, 1]
+    disp = np.zeros_like(pos)
+    for start in range(0, len(pos), chunk):
+        dx = pos[start:start + chunk, 0, None] - ox[None, :]
+        dy = pos[start:start + chunk, 1, None] - oy[None, :]
+        inv = 1.0 / (dx * dx + dy * dy + 1e-9)
+        if weights is not None:
+            inv *= weights
+        disp[start:start + chunk, 0] = k2 * (dx * inv).sum(axis=1)
+        disp[start:start + chunk, 1] = k2 * (dy * inv).sum(axis=1)
+    return disp
+
+
+def _lookup(keys: np.ndarray, wanted: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """在有序的格子编号中查找，返回下标和是否存在"""
+    idx = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return idx, valid & (keys[idx] == wanted)
+
+
+def _tree_repulsion(pos: np.ndarray, k2: float) -> np.ndarray:
+    """多层网格（四叉树）近似的斥力，思路同 Barnes-Hut：
+
+    每一层中，节点只与"父格子的相邻格子的子格子中、与自己不相邻"的格子按质心和节点数计算斥力；
+    逐层细分直到每个格子不超过 LEAF_SIZE 个节点，最细一层相邻 3x3 格子内的节点两两精确计算。
+    各层的格子恰好覆盖所有其他节点，每个节点每层最多与 27 个格子作用
+    """
+    n = len(pos)
+    lo = pos.min(axis=0)
+    span = max(float((pos.max(axis=0) - lo).max()), 1e-9)
+    offsets = np.arange(-2, 4)
+    disp = np.zeros_like(pos)
+
+    # 远场：逐层按格子质心计算
+    for level in range(2, MAX_TREE_LEVEL + 1):
+        size = 1 << level
+        xy = np.minimum(((pos - lo) / span * size).astype(np.int64), size - 1)
+        keys, inverse, counts = np.unique(xy[:, 0] * size + xy[:, 1], return_inverse=True, return_counts=True)
+        cx = np.bincount(inverse, weights=pos[:, 0]) / counts
+        cy = np.bincount(inverse, weights=pos[:, 1]) / counts
+
+        bx = np.repeat((2 * (xy[:, 0] // 2))[:, None] + offsets[None, :], 6, axis=1)
+        by = np.tile((2 * (xy[:, 1] // 2))[:, None] + offsets[None, :], (1, 6))
+        valid = (bx >= 0) & (bx < size) & (by >= 0) & (by < size)
+        valid &= (np.abs(bx - xy[:, 0, None]) > 1) | (np.abs(by - xy[:, 1, None]) > 1)
+        idx, found = _lookup(keys, bx * size + by, valid)
+
+        weight = np.where(found, counts[idx], 0.0)
+        dx = pos[:, 0, None] - cx[idx]
+        dy = pos[:, 1, None] - cy[idx]
+        weight /= dx * dx + dy * dy + 1e-9
+        disp[:, 0] += k2 * (dx * weight).sum(axis=1)
+        disp[:, 1] += k2 * (dy * weight).sum(axis=1)
+        if counts.max() <= LEAF_SIZE:
+            break
+
+    # 近场：最细一层相邻格子中的节点两两计算
+    order = np.argsort(inverse, kind='stable')
+    starts = np.cumsum(counts) - counts
+    nx = np.repeat(xy[:, 0, None] + np.arange(-1, 2)[None, :], 3, axis=1)
+    ny = np.tile(xy[:, 1, None] + np.arange(-1, 2)[None, :], (1, 3))
+    valid = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+    idx, found = _lookup(keys, nx * size + ny, valid)
+    lengths = np.where(found, counts[idx], 0).ravel()
+
+    total = int(lengths.sum())
+    node = np.repeat(np.repeat(np.arange(n), 9), lengths)
+    within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    other = order[np.repeat(starts[idx].ravel(), lengths) + within]
+    dx = pos[node, 0] - pos[other, 0]
+    dy = pos[node, 1] - pos[other, 1]
+    inv = k2 / (dx * dx + dy * dy + 1e-9)
+    inv[node == other] = 0.0
+    disp[:, 0] += np.bincount(node, weights=dx * inv, minlength=n)
+    disp[:, 1] += np.bincount(node, weights=dy * inv, minlength=n)
+    return disp
+
+
+def force_layout(num_nodes: int, sources: np.ndarray, targets: np.ndarray,
+                 iterations: int = 100, seed: int = 0) -> np.ndarray:
+    """Fruchterman-Reingold 力导向布局，返回 (num_nodes, 2) 的坐标
+
+    大图使用多层网格（Barnes-Hut式）近似的斥力，每轮迭代的开销约为 O(n·log n + 边数)；
+    固定随机种子，同一图谱多次计算得到相同的布局
+    """
+    n = num_nodes
+    if n == 0:
+        return np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+    k = 1.0  # 理想边长
+    k2 = k * k
+    pos = rng.uniform(-0.5, 0.5, (n, 2)) * np.sqrt(n) * k
+
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    initial_temperature = 0.1 * np.sqrt(n) * k
+
+    for it in range(iterations):
+        if n <= EXACT_REPULSION_MAX_NODES:
+            disp = _repulsion(pos, pos, k2)
+        else:
+            disp = _tree_repulsion(pos, k2)
+
+        # 引力 d²/k，沿边方向作用在两个端点上
+        diff = pos[sources] - pos[targets]
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff)) + 1e-9
+        force = diff * (dist / k)[:, None]
+        for d in range(2):
+            disp[:, d] -= np.bincount(sources, weights=force[:, d], minlength=n)
+            disp[:, d] += np.bincount(targets, weights=force[:, d], minlength=n)
+
+        # 位移受温度限制，温度线性下降
+        temperature = initial_temperature * (1.0 - it / iterations) + 0.01 * k
+        length = np.sqrt(np.einsum('ij,ij->i', disp, disp)) + 1e-9
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+
+    return pos
+
+
+def add_layout(data: Dict, iterations: int = 100, seed: int = 0,
+               extent: float = LAYOUT_EXTENT) -> Dict:
+    """计算布局并把坐标写入每个节点的 x/y"""
+    num_nodes, sources, targets = edge_arrays(data)
+    pos = force_layout(num_nodes, sources, targets, iterations=iterations, seed=seed)
+    if num_nodes:
+        pos -= pos.mean(axis=0)
+        pos *= extent / max(np.abs(pos).max(), 1e-9)
+    for node, (x, y) in zip(data.get('nodes', []), np.round(pos, 2).tolist()):
+        node['x'] = x
+        node['y'] = y
+    return data
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="知识图谱离线分析：为前端格式图谱预计算布局和社区")
+    parser.add_argument("graph", help="前端格式的图谱文件")
+    parser.add_argument("--output", default=None, help="输出文件，默认覆盖输入文件")
+    parser.add_argument("--iterations", type=int, default=100, help="布局迭代次数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-layout", action="store_true", help="不计算布局")
+    parser.add_argument("--skip-communities", action="store_true", help="不计算社区")
+    args = parser.parse_args(argv)
+
+    with open(args.graph, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if not args.skip_layout:
+        start = time.perf_counter()
+        add_layout(data, iterations=args.iterations, seed=args.seed)
+        print(f"📐 布局计算完成: {len(data.get('nodes', []))} 个节点, 用时 {time.perf_counter() - start:.2f}s")
+
+    if not args.skip_communities:
+        start = time.perf_counter()
+        q = add_communities(data, seed=args.seed)
+        print(f"🧩 社区发现完成: {len(data['clusters'])} 个社区, 模块度 {q:.3f}, 用时 {time.perf_counter() - start:.2f}s")
+
+    add_stable_ids(data)
+
+    output = args.output or args.graph
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"✅ 已写入: {output}")
+
+
+if __name__ == "__main__":
+    main()
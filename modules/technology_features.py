@@ -0,0 +1,197 @@
+"""
+技术特征的离线提取
+从知识图谱的关系三元组中为每个技术（关系的头实体）计算数值特征，保存为与知识图谱文件同名的 .features.npz，
+决策引擎加载知识图谱时直接读取（文件不存在或已过期时在加载时计算一次），评分时按列向量化使用：
+- 关系数、不同属性数、支撑句子数
+- 实体关系图上的度数和PageRank
+- 从投资、运营成本、规模、效率类属性值中解析出的投资金额（元）、运营成本（元）、规模（吨/年）和效率（0~1），
+  无法解析时为 NaN；每吨等单位成本与总额不可比，不参与解析
+- 决策相关的各属性组的关系数
+
+用法: python -m modules.technology_features data/ccus_v1/knowledge_graph.json [--output out.npz]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from modules.graph_analysis import csr_adjacency, pagerank
+
+INVESTMENT_ATTRIBUTES = ('投资成本', '投资规模', '投资估算')
+OPERATING_COST_ATTRIBUTES = ('运营成本',)
+CAPACITY_ATTRIBUTES = ('建设规模', '捕集规模', '封存规模', '捕集能力')
+EFFICIENCY_ATTRIBUTES = ('捕集效率', '减排效果', '封存效率', '去除率')
+
+# 固定的特征列，之后依次是各属性组的关系数 count:<组名>
+BASE_COLUMNS = ('relations', 'attributes', 'sentences', 'degree', 'pagerank',
+                'investment', 'operating_cost', 'capacity', 'efficiency')
+
+UNIT_SCALES = {'亿': 1e8, '万': 1e4, '千': 1e3, '': 1.0}
+USD_TO_CNY = 7.0
+
+_AMOUNT = re.compile(r'(\d+(?:\.\d+)?)\s*(亿|万|千)?\s*(美元|元)(?!\s*/)')
+_PER_UNIT = re.compile(r'每\s*吨|元\s*/\s*(?:吨|t)|吨\s*(?:CO\s*2|CO₂|二氧化碳)', re.IGNORECASE)
+_CAPACITY = re.compile(r'(\d+(?:\.\d+)?)\s*(亿|万|千)?\s*(?:吨|t)(?:\s*/\s*(d|天|a|年))?', re.IGNORECASE)
+_RATIO = re.compile(r'(\d+(?:\.\d+)?)\s*(?:%\s*)?(?:[-~～至]\s*(\d+(?:\.\d+)?))?\s*%')
+
+
+def parse_amount(text: str) -> float:
+    """金额（元），如 "8531万元"、"5200 万美元"；单位成本（"元/吨"、"每吨二氧化碳约300元"）等无法解析的值返回 NaN"""
+    if _PER_UNIT.search(text):
+        return float('nan')
+    match = _AMOUNT.search(text)
+    if not match:
+        return float('nan')
+    value = float(match.group(1)) * UNIT_SCALES[match.group(2) or '']
+    return value * USD_TO_CNY if match.group(3) == '美元' else value
+
+
+def parse_capacity(text: str) -> float:
+    """规模（吨/年），如 "50 万吨/年"、"100t/d"；无法解析时返回 NaN"""
+    match = _CAPACITY.search(text)
+    if not match:
+        return float('nan')
+    value = float(match.group(1)) * UNIT_SCALES[match.group(2) or '']
+    return value * 365 if match.group(3) in ('d', 'D', '天') else value
+
+
+def parse_ratio(text: str) -> float:
+    """百分比（0~1），区间如 "85-95%" 取中值；无法解析时返回 NaN"""
+    match = _RATIO.search(text)
+    if not match:
+        return float('nan')
+    low = float(match.group(1))
+    high = float(match.group(2)) if match.group(2) else low
+    return min((low + high) / 200.0, 1.0)
+
+
+def feature_columns(groups: Dict[str, Tuple[str, ...]]) -> Tuple[str, ...]:
+    return BASE_COLUMNS + tuple(f'count:{name}' for name in groups)
+
+
+def _count_distinct(rows: np.ndarray, keys: np.ndarray, num_rows: int) -> np.ndarray:
+    """每一行中不同 key 的个数"""
+    if not len(rows):
+        return np.zeros(num_rows, dtype=np.int64)
+    pairs = np.unique(rows * (int(keys.max()) + 1) + keys)
+    return np.bincount(pairs // (int(keys.max()) + 1), minlength=num_rows)
+
+
+def extract_features(triples, groups: Dict[str, Tuple[str, ...]]) -> Tuple[Tuple[str, ...], Tuple[str, ...], np.ndarray]:
+    """每个头实体的特征，返回 (实体名称, 特征列名, float64 特征矩阵)，实体按首次出现的顺序
+
+    triples 为 KnowledgeGraphTriples：词表 strings 以及 heads/labels/tails/sents 四个等长的整数数组，
+    计数类特征都在数组上完成，只有需要解析数值的少量属性值逐个处理；
+    特征矩阵用 float64 存放，投资金额（如 9.45e9 元）会原样返回给客户端，float32 的精度不够
+    """
+    strings = triples.strings
+    heads = triples.heads.astype(np.int64)
+    labels = triples.labels.astype(np.int64)
+    tails = triples.tails.astype(np.int64)
+    sents = triples.sents.astype(np.int64)
+
+    # 头实体按首次出现的顺序编号
+    head_ids, first = np.unique(heads, return_index=True)
+    head_ids = head_ids[np.argsort(first, kind='stable')]
+    m = len(head_ids)
+    row_of = np.full(len(strings), -1, dtype=np.int64)
+    row_of[head_ids] = np.arange(m)
+    rows = row_of[heads]
+
+    # 实体关系图（无向、重复边合并）上的度数和PageRank
+    entities = np.unique(np.concatenate([heads, tails]))
+    n = len(entities)
+    a, b = np.searchsorted(entities, heads), np.searchsorted(entities, tails)
+    pairs = np.unique(np.minimum(a, b) * max(n, 1) + np.maximum(a, b))
+    indptr, indices = csr_adjacency(n, pairs // max(n, 1), pairs % max(n, 1))
+    degree = np.diff(indptr)
+    rank = pagerank(indptr, indices, n)
+    head_entities = np.searchsorted(entities, head_ids)
+
+    columns = feature_columns(groups)
+    values = np.zeros((m, len(columns)), dtype=np.float64)
+    values[:, 0] = np.bincount(rows, minlength=m)
+    values[:, 1] = _count_distinct(rows, labels, m)
+    values[:, 2] = _count_distinct(rows, sents, m)
+    values[:, 3] = degree[head_entities]
+    values[:, 4] = rank[head_entities]
+
+    # 关系名称只有少量几种，按名称找到各属性对应的关系编号
+    label_ids = np.unique(labels)
+    label_name = {strings[i]: i for i in label_ids.tolist()}
+
+    def label_mask(attrs):
+        return np.isin(labels, [label_name[attr] for attr in attrs if attr in label_name])
+
+    parsers = [(INVESTMENT_ATTRIBUTES, parse_amount), (OPERATING_COST_ATTRIBUTES, parse_amount),
+               (CAPACITY_ATTRIBUTES, parse_capacity), (EFFICIENCY_ATTRIBUTES, parse_ratio)]
+    for k, (attrs, parse) in enumerate(parsers):
+        parsed = {}
+        numbers = {}
+        selected = np.flatnonzero(label_mask(attrs))
+        for row, tail in zip(rows[selected].tolist(), tails[selected].tolist()):
+            if tail not in numbers:
+                numbers[tail] = parse(strings[tail])
+            if numbers[tail] == numbers[tail]:
+                parsed.setdefault(row, []).append(numbers[tail])
+        column = np.full(m, np.nan, dtype=np.float64)
+        for row, found in parsed.items():
+            column[row] = np.median(found)
+        values[:, 5 + k] = column
+
+    for g, attrs in enumerate(groups.values()):
+        values[:, len(BASE_COLUMNS) + g] = np.bincount(rows[label_mask(attrs)], minlength=m)
+    return tuple(strings[i] for i in head_ids.tolist()), columns, values
+
+
+def features_path(kg_path: str) -> str:
+    """知识图谱文件对应的特征表路径"""
+    return os.path.splitext(kg_path)[0] + '.features.npz'
+
+
+def save_features(path: str, kg_version: str, names: Tuple[str, ...], columns: Tuple[str, ...], values: np.ndarray):
+    np.savez(path, kg_version=np.array(kg_version), names=np.array(names, dtype=str),
+             columns=np.array(columns, dtype=str), values=values.astype(np.float64))
+
+
+def load_features(path: str, kg_version: str,
+                  columns: Tuple[str, ...]) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...], np.ndarray]]:
+    """读取特征表，文件不存在、知识图谱版本或特征列不一致，或者是早先以 float32 保存的特征表时返回 None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as table:
+            if str(table['kg_version']) != kg_version or tuple(table['columns'].tolist()) != tuple(columns):
+                return None
+            if table['values'].dtype != np.float64:
+                return None
+            return tuple(table['names'].tolist()), tuple(columns), table['values']
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Warning: failed to load technology features {path}: {e}")
+        return None
+
+
+def main(argv: Optional[List[str]] = None):
+    from modules.ccus_decision_engine import FEATURE_ATTRIBUTES, INDUSTRY_ATTRIBUTES, KnowledgeGraphTriples
+
+    parser = argparse.ArgumentParser(description='为决策引擎离线提取技术特征')
+    parser.add_argument('kg_path', help='知识图谱文件（每行一个JSON）')
+    parser.add_argument('--output', help='输出路径，默认与知识图谱同名的 .features.npz')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    triples = KnowledgeGraphTriples(args.kg_path)
+    names, columns, values = extract_features(triples, {**FEATURE_ATTRIBUTES, 'industry': INDUSTRY_ATTRIBUTES})
+    output = args.output or features_path(args.kg_path)
+    save_features(output, triples.version, names, columns, values)
+    print(f"✅ 提取 {len(names)} 个技术的 {len(columns)} 项特征, 用时 {time.perf_counter() - start:.2f}s -> {output}")
+
+
+if __name__ == '__main__':
+    main()
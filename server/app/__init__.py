@@ -6,10 +6,17 @@ from app.utils.chat_glm import start_model
 apps = Flask(__name__)# 这段代码是为了解决跨域问题，Flask默认不支持跨域
 CORS(apps, resources=r'/*')# CORS的用法是
 
-from app.views import chat, graph, ccus_decision
+from app.views import chat, graph, ccus_decision, metrics, profiler
 apps.register_blueprint(chat.mod)
 apps.register_blueprint(graph.mod)
 apps.register_blueprint(ccus_decision.mod)
+apps.register_blueprint(metrics.mod)
+apps.register_blueprint(profiler.mod)
+
+from app import config
+if config.PROFILING_ENABLED:
+    from app.utils.profiler import request_profiler
+    request_profiler.init_app(apps)
 
 
 @apps.route('/', methods=["GET"])
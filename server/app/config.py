@@ -0,0 +1,82 @@
+# coding=utf-8
+"""
+服务端运行配置
+所有配置项均可通过环境变量覆盖，便于在不同部署环境下调整
+"""
+
+import os
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# ===== 服务 =====
+SERVER_PORT = _env_int('SERVER_PORT', 5000)                    # 起始端口，被占用时向后查找
+
+# ===== 日志与追踪 =====
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()                 # DEBUG 时输出每个请求的详细过程
+TRACE_ENABLED = os.environ.get('TRACE_ENABLED', '1') not in ('0', 'false', 'False')
+TRACE_FILE = os.environ.get('TRACE_FILE', 'logs/chat_trace.jsonl')     # 为空时不写追踪文件
+TRACE_FILE_MAX_BYTES = _env_int('TRACE_FILE_MAX_BYTES', 10 * 1024 * 1024)
+TRACE_FILE_BACKUPS = _env_int('TRACE_FILE_BACKUPS', 5)
+
+# ===== /chat 准入控制 =====
+CHAT_MAX_CONCURRENT = _env_int('CHAT_MAX_CONCURRENT', 1)       # 同时进行的生成数量
+CHAT_MAX_QUEUE = _env_int('CHAT_MAX_QUEUE', 8)                 # 等待队列最大长度
+CHAT_QUEUE_TIMEOUT = _env_float('CHAT_QUEUE_TIMEOUT', 30.0)    # 单个请求最长排队时间（秒）
+CHAT_LATENCY_TARGET = _env_float('CHAT_LATENCY_TARGET', 60.0)  # 已准入请求的p99延迟目标（秒），0表示不限制
+
+# ===== 知识图谱 =====
+GRAPH_DATA_PATH = os.environ.get('GRAPH_DATA_PATH', 'data/ccus_data.json')
+GRAPH_FALLBACK_PATH = os.environ.get('GRAPH_FALLBACK_PATH', 'data/data.json')  # 主图谱文件不存在时使用
+GRAPH_GZIP_LEVEL = _env_int('GRAPH_GZIP_LEVEL', 9)             # 每个图谱版本只压缩一次，使用最高压缩级别
+GRAPH_BROTLI_QUALITY = _env_int('GRAPH_BROTLI_QUALITY', 9)
+GRAPH_OVERVIEW_NODES = _env_int('GRAPH_OVERVIEW_NODES', 200)    # /graph/overview 默认节点数
+GRAPH_MAX_NODES = _env_int('GRAPH_MAX_NODES', 2000)             # 单次概览/展开返回的节点数上限
+GRAPH_MAX_LINKS = _env_int('GRAPH_MAX_LINKS', 10000)           # 单次概览/展开返回的边数上限
+GRAPH_OVERVIEW_CLUSTERS = _env_int('GRAPH_OVERVIEW_CLUSTERS', 50)  # 概览中返回的最大社区数
+GRAPH_EXPAND_MAX_HOPS = _env_int('GRAPH_EXPAND_MAX_HOPS', 3)
+GRAPH_SEARCH_MAX_RESULTS = _env_int('GRAPH_SEARCH_MAX_RESULTS', 50)
+GRAPH_SUGGEST_TOP_K = _env_int('GRAPH_SUGGEST_TOP_K', 10)      # 输入提示预计算的补全数量
+GRAPH_PATH_MAX_HOPS = _env_int('GRAPH_PATH_MAX_HOPS', 6)       # 关联路径查询的最大跳数
+GRAPH_PATH_MAX_K = _env_int('GRAPH_PATH_MAX_K', 10)
+GRAPH_HISTORY_VERSIONS = _env_int('GRAPH_HISTORY_VERSIONS', 10)  # /graph/changes 可比较的历史版本数
+GRAPH_HISTORY_DIR = os.environ.get('GRAPH_HISTORY_DIR', 'logs/graph_versions')  # 版本清单的保存目录，为空时只保存在内存中
+
+# ===== 对话语言模型后端 =====
+LLM_BACKEND = os.environ.get('LLM_BACKEND', 'chatglm')                  # chatglm / stub
+CHATGLM_MODEL_PATH = os.environ.get('CHATGLM_MODEL_PATH', '/fast/zwj/ChatGLM-6B/weights')
+
+# stub 后端：确定性的本地替身，用于无GPU环境下的压测和性能分析
+LLM_STUB_TOKEN_RATE = _env_float('LLM_STUB_TOKEN_RATE', 20.0)                 # 每秒token数
+LLM_STUB_FIRST_TOKEN_LATENCY = _env_float('LLM_STUB_FIRST_TOKEN_LATENCY', 0.2)  # 首字延迟均值（秒）
+LLM_STUB_LATENCY_JITTER = _env_float('LLM_STUB_LATENCY_JITTER', 0.0)
+LLM_STUB_LATENCY_DISTRIBUTION = os.environ.get('LLM_STUB_LATENCY_DISTRIBUTION', 'fixed')  # fixed / uniform / lognormal
+LLM_STUB_MAX_TOKENS = _env_int('LLM_STUB_MAX_TOKENS', 64)
+LLM_STUB_SEED = _env_int('LLM_STUB_SEED', 0)
+
+# ===== CCUS决策 =====
+DECISION_BATCH_MAX_SCENARIOS = _env_int('DECISION_BATCH_MAX_SCENARIOS', 10000)  # /api/ccus/decision/batch 单次条件数上限
+DECISION_MAX_LIMIT = _env_int('DECISION_MAX_LIMIT', 50)       # 每个条件返回的推荐数上限
+DECISION_CACHE_SIZE = _env_int('DECISION_CACHE_SIZE', 1024)    # 推荐结果缓存条目数，0表示不缓存
+DECISION_KG_KEEP_VERSIONS = _env_int('DECISION_KG_KEEP_VERSIONS', 3)     # 内存中保留的知识图谱版本数
+DECISION_KG_POLL_INTERVAL = _env_float('DECISION_KG_POLL_INTERVAL', 30.0)  # 检查新知识图谱文件的间隔（秒），0表示不检查
+
+# ===== 按需性能分析 =====
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') in ('1', 'true', 'True')  # 关闭时不注册任何请求钩子
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')        # 非空时 X-Profile 请求头和管理接口需携带该令牌
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'logs/profiles')
+PROFILE_KEEP = _env_int('PROFILE_KEEP', 20)                    # 保留最近的分析结果份数
+PROFILE_SAMPLE_INTERVAL = _env_float('PROFILE_SAMPLE_INTERVAL', 0.005)  # 采样分析间隔（秒）
+PROFILE_MAX_SECONDS = _env_int('PROFILE_MAX_SECONDS', 300)     # 采样分析窗口上限（秒）
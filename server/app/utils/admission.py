@@ -0,0 +1,160 @@
+"""
+对话请求准入控制
+限制同时进行的生成数量，超出部分进入有界等待队列，队列已满时直接拒绝
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+
+class AdmissionRejected(Exception):
+    """请求未被准入"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """已准入请求的凭证，release 可重复调用，只生效一次"""
+
+    def __init__(self, controller, wait_time):
+        self._controller = controller
+        self._released = False
+        self._lock = threading.Lock()
+        self.wait_time = wait_time
+        self.admitted_at = time.time()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._controller._release(time.time() - self.admitted_at)
+
+
+class AdmissionController:
+    """并发生成数 + 有界等待队列的准入控制器"""
+
+    def __init__(self, max_concurrent=1, max_queue=8, queue_timeout=30.0,
+                 latency_target=0.0, window_size=512):
+        """
+        Args:
+            max_concurrent: 同时进行的生成数量
+            max_queue: 等待队列最大长度
+            queue_timeout: 单个请求最长排队时间（秒）
+            latency_target: 已准入请求的p99延迟目标（秒），预计无法达标的请求直接拒绝，0表示不限制
+            window_size: 统计等待时间和服务时间的滑动窗口大小
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+
+        self._admitted_total = 0
+        self._rejected = {"queue_full": 0, "timeout": 0, "latency_target": 0}
+        self._wait_times = deque(maxlen=window_size)
+        self._service_times = deque(maxlen=window_size)
+        self._service_ewma = None
+
+    def _estimated_service_time(self):
+        return self._service_ewma if self._service_ewma is not None else 0.0
+
+    def _retry_after(self):
+        """根据当前排队长度和平均服务时间估算建议的重试间隔（秒）"""
+        service = self._estimated_service_time() or 1.0
+        backlog = self._waiting + self._active
+        return max(1, int(math.ceil(backlog * service / self.max_concurrent)))
+
+    def _reject(self, reason):
+        self._rejected[reason] += 1
+        raise AdmissionRejected(reason, self._retry_after())
+
+    def acquire(self):
+        """申请一个生成名额，失败时抛出 AdmissionRejected"""
+        start = time.time()
+        with self._cond:
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                return self._admit(start)
+
+            if self._waiting >= self.max_queue:
+                self._reject("queue_full")
+
+            # 预计排队 + 服务时间超过延迟目标时，排队只会拖慢所有人
+            if self.latency_target > 0 and self._service_ewma is not None:
+                expected_wait = (self._waiting + 1) * self._service_ewma / self.max_concurrent
+                if expected_wait + self._service_ewma > self.latency_target:
+                    self._reject("latency_target")
+
+            self._waiting += 1
+            try:
+                deadline = start + self.queue_timeout
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self._reject("timeout")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            self._active += 1
+            return self._admit(start)
+
+    def _admit(self, start):
+        wait_time = time.time() - start
+        self._admitted_total += 1
+        self._wait_times.append(wait_time)
+        return AdmissionTicket(self, wait_time)
+
+    def _release(self, service_time):
+        with self._cond:
+            self._active -= 1
+            self._service_times.append(service_time)
+            if self._service_ewma is None:
+                self._service_ewma = service_time
+            else:
+                self._service_ewma = 0.8 * self._service_ewma + 0.2 * service_time
+            self._cond.notify()
+
+    def wrap_stream(self, ticket, stream):
+        """包装流式生成器，在生成结束（包括异常和客户端断开）后释放名额"""
+        try:
+            for chunk in stream:
+                yield chunk
+        finally:
+            ticket.release()
+
+    def get_stats(self):
+        """获取准入控制统计信息"""
+        with self._cond:
+            wait_times = sorted(self._wait_times)
+            service_times = sorted(self._service_times)
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._waiting,
+                "admitted_total": self._admitted_total,
+                "rejected_total": sum(self._rejected.values()),
+                "rejected": dict(self._rejected),
+                "wait_time_avg": round(sum(wait_times) / len(wait_times), 4) if wait_times else 0.0,
+                "wait_time_p99": round(_percentile(wait_times, 0.99), 4),
+                "service_time_p99": round(_percentile(service_times, 0.99), 4),
+                "latency_target": self.latency_target,
+            }
+
+
+def _percentile(sorted_values, q):
+    """对已排序的列表取分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(math.ceil(q * len(sorted_values))) - 1)
+    return sorted_values[max(0, index)]
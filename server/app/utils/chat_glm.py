@@ -2,8 +2,13 @@ import os
 import sys
 sys.path.append('server/app')
 import json
+import logging
+import time
 from opencc import OpenCC
-from transformers import AutoTokenizer, AutoModel
+from app import config
+from app.utils.logger import logger
+from app.utils.tracing import tracer
+from app.utils.llm_backend import ChatGLMBackend, create_backend
 from app.utils.image_searcher import ImageSearcher
 from app.utils.query_wiki import WikiSearcher
 from app.utils.ner import Ner
@@ -117,6 +122,7 @@ class KnowledgeGraphQA:
         structured_info = {
             'entities': entities,
             'relations': [],
+            'paths': [],
             'knowledge_text': "",
             'context_info': {}
         }
@@ -169,8 +175,21 @@ class KnowledgeGraphQA:
             entities_str = "、".join(structured_info['entities'][:5])
             prompt_parts.append(f"相关实体: {entities_str}")
 
+        # 关系类问题：添加实体之间的关联路径及其依据，不再罗列零散的三元组
+        if structured_info.get('paths'):
+            paths_str = "; ".join(path['description'] for path in structured_info['paths'])
+            prompt_parts.append(f"关联路径: {paths_str}")
+            evidence = []
+            for path in structured_info['paths']:
+                for hop in path['hops']:
+                    sentence = " ".join(hop['sentence'].split())[:100]
+                    if sentence and sentence not in evidence:
+                        evidence.append(sentence)
+            if evidence:
+                prompt_parts.append(f"路径依据: {' '.join(evidence[:3])}")
+
         # 添加关系信息
-        if structured_info['relations']:
+        elif structured_info['relations']:
             relations_str = "; ".join([rel['description'] for rel in structured_info['relations'][:5]])
             prompt_parts.append(f"知识关系: {relations_str}")
 
@@ -199,18 +218,19 @@ class KnowledgeGraphQA:
         return prompt
 
     def generate_response(self, prompt, history, chat_glm_model=None):
-        """步骤6: 对话语言模型生成回答 - 使用SimpleChatGLM"""
-        global chat_glm
+        """步骤6: 对话语言模型生成回答 - 使用配置的LLM后端"""
+        global llm_backend
 
-        print("🤖 [CHATGLM] === 开始生成回答 ===")
-        print(f"🤖 [CHATGLM] 是否有SimpleChatGLM: {chat_glm is not None}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("🤖 [CHATGLM] 开始生成回答, LLM后端: %s",
+                         llm_backend.name if llm_backend is not None else None)
 
-        # 使用SimpleChatGLM实例
-        if chat_glm is not None and chat_glm.loaded:
-            print("🤖 [CHATGLM] 使用SimpleChatGLM调用方式")
-            print(f"🤖 [CHATGLM] Prompt长度: {len(prompt)} 字符")
-            print(f"🤖 [CHATGLM] Prompt预览: {prompt[:200]}...")
-            print(f"🤖 [CHATGLM] History长度: {len(history)}")
+        # 使用配置的LLM后端
+        if llm_backend is not None and llm_backend.available:
+            if debug:
+                logger.debug("🤖 [CHATGLM] Prompt长度: %d 字符, History长度: %d", len(prompt), len(history))
+                logger.debug("🤖 [CHATGLM] Prompt预览: %s...", prompt[:200])
 
             try:
                 # 将知识图谱格式的prompt转换为用户问题
@@ -230,35 +250,30 @@ class KnowledgeGraphQA:
                 else:
                     chat_input = prompt
 
-                print(f"🤖 [CHATGLM] 转换后的chat_input: {chat_input[:200]}...")
+                if debug:
+                    logger.debug("🤖 [CHATGLM] 转换后的chat_input: %s...", chat_input[:200])
 
                 response_count = 0
-                # 使用SimpleChatGLM的stream_chat方法
-                for response, updated_history in chat_glm.stream_chat(chat_input, history):
+                # 使用后端的stream方法
+                for response in llm_backend.stream(chat_input, history):
                     response_count += 1
-                    print(f"🤖 [CHATGLM] 第{response_count}个SimpleChatGLM响应:")
-                    print(f"🤖 [CHATGLM] 响应长度: {len(response)}")
-                    print(f"🤖 [CHATGLM] 响应预览: {response[:150]}...")
-
-                    # 检查是否是真正的ChatGLM智能回答
-                    if response and len(response.strip()) > 20:
-                        print(f"✅ [CHATGLM] 确认收到ChatGLM智能回复!")
+                    if debug:
+                        logger.debug("🤖 [CHATGLM] 第%d个%s响应, 长度: %d, 预览: %s...",
+                                     response_count, llm_backend.name, len(response), response[:150])
 
-                    yield response, updated_history
+                    yield response, history + [(chat_input, response)]
 
                 if response_count == 0:
-                    print("❌ [CHATGLM] SimpleChatGLM未产生任何响应")
+                    logger.warning("❌ [CHATGLM] %s后端未产生任何响应", llm_backend.name)
 
             except Exception as e:
-                print(f"❌ [CHATGLM] SimpleChatGLM调用异常: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("❌ [CHATGLM] %s后端调用异常: %s", llm_backend.name, e)
                 # 降级到简单模式
                 response = self._generate_simple_response(prompt)
                 updated_history = history + [(prompt, response)]
                 yield response, updated_history
         else:
-            print("⚠️ [CHATGLM] SimpleChatGLM未加载，使用简单模式回答")
+            logger.debug("⚠️ [CHATGLM] LLM后端未加载，使用简单模式回答")
             # 简单模式回答
             response = self._generate_simple_response(prompt)
             updated_history = history + [(prompt, response)]
@@ -315,6 +330,7 @@ class KnowledgeGraphQA:
 # 全局实例
 kg_qa_system = KnowledgeGraphQA()
 chat_glm = None
+llm_backend = None
 
 def predict(user_input, history=None):
     """兼容原有接口"""
@@ -324,81 +340,126 @@ def predict(user_input, history=None):
     return model.chat(tokenizer, user_input, history)
 
 def stream_predict(user_input, history=None):
-    """主要的流式预测函数 - 按照流程图实现"""
+    """主要的流式预测函数 - 按照流程图实现，各步骤耗时记录在追踪中"""
     global model, tokenizer, init_history, chat_glm
 
-    print("🚀 [STREAM_PREDICT] === 开始流式预测 ===")
-    print(f"🚀 [STREAM_PREDICT] 用户输入: {user_input}")
-    print(f"🚀 [STREAM_PREDICT] 全局ChatGLM实例: {chat_glm is not None}")
+    debug = logger.isEnabledFor(logging.DEBUG)
+    trace = tracer.start("chat")
+    status = "error"
 
     if not history:
         history = init_history or []
 
-    print(f"🚀 [STREAM_PREDICT] 历史记录长度: {len(history)}")
-
-    # 步骤1: 命名实体识别
-    print("📝 [STREAM_PREDICT] 步骤1: 命名实体识别")
-    entities = kg_qa_system.named_entity_recognition(user_input)
-    print(f"📝 [STREAM_PREDICT] 识别实体: {entities}")
-
-    # 步骤2: 图谱检索
-    print("🔍 [STREAM_PREDICT] 步骤2: 图谱检索")
-    graph_results = kg_qa_system.graph_search(entities)
-    print(f"🔍 [STREAM_PREDICT] 图谱结果: 节点数={len(graph_results['full_graph'].get('nodes', []))} 三元组数={len(graph_results['triples'])}")
-
-    # 步骤3: 外部知识检索
-    print("🌐 [STREAM_PREDICT] 步骤3: 外部知识检索")
-    external_knowledge = kg_qa_system.external_knowledge_search(entities, user_input)
-    print(f"🌐 [STREAM_PREDICT] Wiki标题: {external_knowledge['wiki']['title']}")
-
-    # 步骤4: 结构化处理
-    print("🔧 [STREAM_PREDICT] 步骤4: 结构化处理")
-    structured_info = kg_qa_system.structured_processing(graph_results, external_knowledge, entities)
-    print(f"🔧 [STREAM_PREDICT] 关系数: {len(structured_info['relations'])} 知识文本长度: {len(structured_info['knowledge_text'])}")
-
-    # 步骤5: 构建prompt
-    print("📋 [STREAM_PREDICT] 步骤5: 构建prompt")
-    prompt = kg_qa_system.build_prompt(user_input, structured_info)
-    print(f"📋 [STREAM_PREDICT] Prompt长度: {len(prompt)} 字符")
-
-    # 更新上下文管理器
-    context_manager.update_context(user_input, entities, graph_results['full_graph'])
-
-    # 步骤6: 对话语言模型生成回答
-    print("🤖 [STREAM_PREDICT] 步骤6: 调用ChatGLM生成回答")
-    response_count = 0
-    for response, updated_history in kg_qa_system.generate_response(prompt, history, None):
-        response_count += 1
-        print(f"📤 [STREAM_PREDICT] 生成第{response_count}个响应")
-
-        # 构建返回结果
-        result = {
-            "history": updated_history,
-            "updates": {
-                "query": user_input,
-                "response": response
-            },
-            "image": external_knowledge.get('image'),
-            "graph": graph_results['full_graph'] if graph_results['full_graph'] and len(graph_results['full_graph'].get('nodes', [])) <= 50 else None,
-            "wiki": external_knowledge['wiki']
-        }
+    if debug:
+        logger.debug("🚀 [STREAM_PREDICT] 用户输入: %s, 历史记录长度: %d", user_input, len(history))
+    trace.set("query_length", len(user_input))
+    trace.set("history_length", len(history))
 
-        json_result = json.dumps(result, ensure_ascii=False).encode('utf8') + b'\n'
-        print(f"📤 [STREAM_PREDICT] 返回结果大小: {len(json_result)} bytes")
-        yield json_result
+    try:
+        # 步骤1: 命名实体识别
+        with trace.span("ner"):
+            entities = kg_qa_system.named_entity_recognition(user_input)
+        if debug:
+            logger.debug("📝 [STREAM_PREDICT] 识别实体: %s", entities)
+
+        # 步骤2: 图谱检索
+        with trace.span("graph_search"):
+            graph_results = kg_qa_system.graph_search(entities)
+        if debug:
+            logger.debug("🔍 [STREAM_PREDICT] 图谱结果: 节点数=%d 三元组数=%d",
+                         len(graph_results['full_graph'].get('nodes', [])), len(graph_results['triples']))
+
+        # 步骤3: 外部知识检索
+        with trace.span("external_search"):
+            external_knowledge = kg_qa_system.external_knowledge_search(entities, user_input)
+        if debug:
+            logger.debug("🌐 [STREAM_PREDICT] Wiki标题: %s", external_knowledge['wiki']['title'])
+
+        # 步骤4: 结构化处理
+        with trace.span("structuring"):
+            structured_info = kg_qa_system.structured_processing(graph_results, external_knowledge, entities)
+            structured_info['paths'] = context_manager.get_relation_paths(user_input, entities)
+
+        # 步骤5: 构建prompt
+        with trace.span("prompt_build"):
+            prompt = kg_qa_system.build_prompt(user_input, structured_info)
+        if debug:
+            logger.debug("📋 [STREAM_PREDICT] 关系数: %d 知识文本长度: %d Prompt长度: %d",
+                         len(structured_info['relations']), len(structured_info['knowledge_text']), len(prompt))
+
+        # 更新上下文管理器
+        context_manager.update_context(user_input, entities, graph_results['full_graph'])
+
+        trace.set("entities", len(entities))
+        trace.set("triples", len(graph_results['triples']))
+        trace.set("paths", len(structured_info['paths']))
+        trace.set("prompt_length", len(prompt))
+
+        # 步骤6: 对话语言模型生成回答
+        response_count = 0
+        response_bytes = 0
+        generation_start = time.perf_counter()
+        for response, updated_history in kg_qa_system.generate_response(prompt, history, None):
+            response_count += 1
+            if response_count == 1:
+                trace.add("first_token", time.perf_counter() - generation_start)
+
+            # 构建返回结果
+            result = {
+                "history": updated_history,
+                "updates": {
+                    "query": user_input,
+                    "response": response
+                },
+                "image": external_knowledge.get('image'),
+                "graph": graph_results['full_graph'] if graph_results['full_graph'] and len(graph_results['full_graph'].get('nodes', [])) <= 50 else None,
+                "wiki": external_knowledge['wiki']
+            }
 
-    print(f"✅ [STREAM_PREDICT] 流式预测完成，总共生成{response_count}个响应")
+            json_result = json.dumps(result, ensure_ascii=False).encode('utf8') + b'\n'
+            response_bytes += len(json_result)
+            if debug:
+                logger.debug("📤 [STREAM_PREDICT] 第%d个响应, 大小: %d bytes", response_count, len(json_result))
+            yield json_result
+
+        trace.add("generation", time.perf_counter() - generation_start)
+        trace.set("chunks", response_count)
+        trace.set("response_bytes", response_bytes)
+        tracer.incr("chat_chunks_total", response_count)
+        tracer.incr("chat_response_bytes_total", response_bytes)
+        status = "ok"
+        logger.info("✅ [STREAM_PREDICT] 流式预测完成, 共%d个响应, trace=%s", response_count, trace.trace_id)
+    except GeneratorExit:
+        # 客户端提前断开
+        status = "cancelled"
+        raise
+    finally:
+        trace.finish(status)
 
 def start_model():
-    """加载模型 - 使用SimpleChatGLM实现"""
-    global model, tokenizer, init_history, chat_glm
+    """加载模型 - 按配置选择LLM后端，默认使用SimpleChatGLM实现"""
+    global model, tokenizer, init_history, chat_glm, llm_backend
+
+    if config.LLM_BACKEND != ChatGLMBackend.name:
+        print(f"🚀 [START_MODEL] 使用{config.LLM_BACKEND}后端，跳过ChatGLM模型加载")
+        llm_backend = create_backend(
+            config.LLM_BACKEND,
+            token_rate=config.LLM_STUB_TOKEN_RATE,
+            first_token_latency=config.LLM_STUB_FIRST_TOKEN_LATENCY,
+            latency_jitter=config.LLM_STUB_LATENCY_JITTER,
+            latency_distribution=config.LLM_STUB_LATENCY_DISTRIBUTION,
+            max_tokens=config.LLM_STUB_MAX_TOKENS,
+            seed=config.LLM_STUB_SEED
+        )
+        init_history = []
+        return
 
     print("🚀 [START_MODEL] === 开始加载ChatGLM模型（使用SimpleChatGLM）===")
 
     try:
         from app.utils.simple_chat import SimpleChatGLM
 
-        model_path = "/fast/zwj/ChatGLM-6B/weights"
+        model_path = config.CHATGLM_MODEL_PATH
         print(f"📁 [START_MODEL] 模型路径: {model_path}")
 
         # 创建SimpleChatGLM实例
@@ -413,6 +474,7 @@ def start_model():
             # 获取内部模型和分词器用于兼容性
             model = chat_glm.model
             tokenizer = chat_glm.tokenizer
+            llm_backend = ChatGLMBackend(chat_glm)
 
             # 初始化历史记录
             print("🔄 [START_MODEL] 初始化历史记录...")
@@ -438,6 +500,7 @@ def start_model():
             tokenizer = None
             init_history = []
             chat_glm = None
+            llm_backend = None
 
     except Exception as e:
         print(f"❌ [START_MODEL] 模型加载失败: {e}")
@@ -447,5 +510,6 @@ def start_model():
         tokenizer = None
         init_history = []
         chat_glm = None
+        llm_backend = None
 
     print("🎯 [START_MODEL] 模型加载流程完成!")
\ No newline at end of file
@@ -6,6 +6,9 @@
 import json
 from collections import defaultdict
 from app.utils.graph_utils import search_node_item, get_entity_details
+from app.utils.graph_paths import find_relation_paths
+from app.utils.graph_store import graph_store
+from app.utils.logger import logger
 
 
 class ContextManager:
@@ -19,7 +22,7 @@ class ContextManager:
 
     def update_context(self, user_input, entities, graph):
         """更新对话上下文"""
-        print(f"🔄 Updating context with entities: {entities}")
+        logger.debug("🔄 Updating context with entities: %s", entities)
 
         # 更新实体列表
         for entity in entities:
@@ -44,7 +47,7 @@ class ContextManager:
         # 分析话题上下文
         self._analyze_topic_context(user_input, entities)
 
-        print(f"📊 Context: {len(self.conversation_entities)} entities tracked")
+        logger.debug("📊 Context: %d entities tracked", len(self.conversation_entities))
 
     def _analyze_topic_context(self, user_input, entities):
         """分析话题上下文"""
@@ -100,6 +103,17 @@ class ContextManager:
 
         return focused_graph
 
+    def get_relation_paths(self, user_input, entities, k=2, max_hops=4):
+        """关系类问题：前两个实体之间最短的几条关联路径，代替合并多个实体子图"""
+        if len(entities) < 2 or self._identify_question_type(user_input) != "relationship":
+            return []
+        try:
+            paths = find_relation_paths(graph_store.current(), entities[0], entities[1], k=k, max_hops=max_hops)
+        except FileNotFoundError:
+            return []
+        logger.debug("🔗 Relation paths between %s and %s: %d", entities[0], entities[1], len(paths or []))
+        return paths or []
+
     def _merge_graphs(self, graph1, graph2):
         """合并两个图谱"""
         if not graph1:
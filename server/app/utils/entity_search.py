@@ -0,0 +1,242 @@
+"""
+图谱实体的检索与输入提示
+- 模糊检索：按字符三元组建立倒排索引，查询时先用三元组重合度从倒排表中选出候选，
+  再对少量候选计算有界编辑距离重排，开销与候选数相关而与节点总数无关
+- 输入提示：节点名称和别名排序后二分查找前缀，短前缀的 top-k 结果预先算好
+"""
+
+import bisect
+import unicodedata
+
+import numpy as np
+
+# 出现在超过该比例节点中的三元组区分度太低，查询时跳过（查询只有这类三元组时除外）
+COMMON_GRAM_RATIO = 0.05
+
+# 常用别名 -> 图谱中的实体名，图谱节点也可以通过 aliases 字段提供别名
+ENTITY_ALIASES = {
+    '碳捕集利用与储存': 'CCUS',
+    '碳捕集利用与封存': 'CCUS',
+    '碳捕集与储存': 'CCS',
+    '碳捕集与封存': 'CCS',
+    '碳捕集与利用': 'CCU',
+    'carbon capture utilization and storage': 'CCUS',
+    'carbon capture and storage': 'CCS',
+    '二氧化碳': 'CO2',
+    '直接空气捕集': 'DAC',
+    '整体煤气化联合循环': 'IGCC',
+    '提高石油采收率': 'CO2-EOR',
+}
+
+
+def normalize(text):
+    """统一全角/半角和大小写，去掉空白"""
+    return "".join(unicodedata.normalize('NFKC', str(text)).lower().split())
+
+
+def trigrams(text):
+    """首尾补齐后的字符三元组，短的中文实体名也能产生足够的三元组"""
+    padded = f"\x02\x02{text}\x03\x03"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a, b, max_dist):
+    """编辑距离，超过 max_dist 时提前结束并返回 max_dist + 1"""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+class EntitySearchIndex:
+    """节点名称的三元组倒排索引"""
+
+    def __init__(self, index):
+        self.index = index
+        self.names = [normalize(node.get('name', '')) for node in index.nodes]
+        # 规范化名称 -> 节点下标，同名时取第一个
+        self.exact = {}
+        for i, name in enumerate(self.names):
+            self.exact.setdefault(name, i)
+
+        gram_ids = {}
+        postings = []
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                postings.append((gram_ids.setdefault(gram, len(gram_ids)), i))
+        self.gram_ids = gram_ids
+
+        # 倒排表以CSR形式存放：gram -> 节点下标数组
+        pairs = np.array(postings, dtype=np.int64).reshape(-1, 2)
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        self.posting_nodes = pairs[order, 1].astype(np.int32)
+        self.posting_ptr = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=len(gram_ids)), out=self.posting_ptr[1:])
+        self.gram_counts = np.bincount(pairs[:, 1], minlength=len(self.names)).astype(np.float64)
+        self.common_limit = max(1, int(len(self.names) * COMMON_GRAM_RATIO))
+
+    def _postings(self, gram_id):
+        return self.posting_nodes[self.posting_ptr[gram_id]:self.posting_ptr[gram_id + 1]]
+
+    def candidates(self, query, limit):
+        """三元组 Dice 系数最高的候选节点下标及其系数"""
+        grams = trigrams(query)
+        lists = [self._postings(self.gram_ids[g]) for g in grams if g in self.gram_ids]
+        if not lists:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        selective = [p for p in lists if len(p) <= self.common_limit]
+        nodes, overlap = np.unique(np.concatenate(selective or [min(lists, key=len)]), return_counts=True)
+        dice = 2.0 * overlap / (len(grams) + self.gram_counts[nodes])
+        if len(nodes) > limit:
+            top = np.argpartition(-dice, limit)[:limit]
+            nodes, dice = nodes[top], dice[top]
+        return nodes, dice
+
+    def search(self, query, limit=10, candidates=50, ranking='degree', preview=5):
+        """返回按分数排序的匹配节点，分数综合三元组重合度和编辑距离，附带1跳邻居预览"""
+        query = normalize(query)
+        if not query:
+            return []
+        nodes, dice = self.candidates(query, max(limit, candidates))
+        score_of = self.index.scores[ranking]
+
+        max_dist = max(1, len(query) // 2)
+        results = []
+        for i, d in zip(nodes.tolist(), dice.tolist()):
+            name = self.names[i]
+            if name == query:
+                score = 1.0
+            else:
+                dist = bounded_edit_distance(query, name, max_dist)
+                similarity = 1.0 - dist / max(len(query), len(name)) if dist <= max_dist else 0.0
+                if query in name:
+                    similarity = max(similarity, len(query) / len(name))
+                score = 0.6 * similarity + 0.4 * d
+            results.append((score, score_of[i], i))
+        results.sort(key=lambda r: (-r[0], -r[1]))
+
+        return [self._result(i, score, preview) for score, _, i in results[:limit]]
+
+    def _result(self, i, score, preview):
+        node = self.index.nodes[i]
+        neighbors, edges = self.index.neighbors(i)
+        degree = self.index.degree
+        previews, seen = [], {i}
+        for k in np.argsort(-degree[neighbors], kind='stable').tolist():
+            j = int(neighbors[k])
+            if j in seen:
+                continue
+            seen.add(j)
+            previews.append({
+                'id': self.index.nodes[j]['id'],
+                'name': self.index.nodes[j].get('name', ''),
+                'relation': self.index.links[int(edges[k])].get('name', ''),
+            })
+            if len(previews) >= preview:
+                break
+        return {
+            'id': node['id'],
+            'name': node.get('name', ''),
+            'category': node.get('category'),
+            'cluster': int(self.index.cluster[i]),
+            'degree': int(degree[i]),
+            'score': round(score, 4),
+            'neighbors': previews,
+        }
+
+
+class EntitySuggestIndex:
+    """节点名称和别名的前缀索引，按度数或PageRank返回补全结果"""
+
+    def __init__(self, index, aliases=None, top_k=10, precompute_depth=2):
+        self.index = index
+        self.top_k = top_k
+        self.precompute_depth = precompute_depth
+
+        name_to_index = {}
+        entries = []  # (key, 节点下标, 别名原文)
+        for i, node in enumerate(index.nodes):
+            name = node.get('name', '')
+            name_to_index.setdefault(name, i)
+            entries.append((normalize(name), i, None))
+            for alias in node.get('aliases', []):
+                entries.append((normalize(alias), i, alias))
+        for alias, name in (ENTITY_ALIASES if aliases is None else aliases).items():
+            if name in name_to_index:
+                entries.append((normalize(alias), name_to_index[name], alias))
+        entries = [e for e in entries if e[0]]
+        entries.sort(key=lambda e: e[0])
+
+        self.keys = [e[0] for e in entries]
+        self.key_nodes = np.array([e[1] for e in entries], dtype=np.int64)
+        self.key_aliases = [e[2] for e in entries]
+        self.key_is_alias = np.array([e[2] is not None for e in entries], dtype=bool)
+
+        # 短前缀匹配的范围很大，预先算好每种排序方式下的 top-k
+        self.precomputed = {ranking: {} for ranking in index.scores}
+        prefixes = {key[:n] for key in self.keys for n in range(1, precompute_depth + 1) if len(key) >= n}
+        for prefix in prefixes:
+            lo, hi = self._range(prefix)
+            for ranking, table in self.precomputed.items():
+                table[prefix] = self._top(lo, hi, ranking)
+
+    def _range(self, prefix):
+        return bisect.bisect_left(self.keys, prefix), bisect.bisect_left(self.keys, prefix + '\U0010ffff')
+
+    def _top(self, lo, hi, ranking):
+        """范围内得分最高的 top_k 个不同节点对应的条目位置，同一节点优先取名称本身匹配的条目"""
+        nodes = self.key_nodes[lo:hi]
+        score = self.index.scores[ranking][nodes]
+        is_alias = self.key_is_alias[lo:hi]
+        head = min(len(nodes), self.top_k * 4)
+        if len(nodes) > head:
+            part = np.argpartition(-score, head - 1)[:head]
+            order = part[np.lexsort((is_alias[part], -score[part]))]
+        else:
+            order = np.lexsort((is_alias, -score))
+        positions, seen = [], set()
+        for k in order.tolist():
+            node = int(nodes[k])
+            if node not in seen:
+                seen.add(node)
+                positions.append(lo + k)
+                if len(positions) >= self.top_k:
+                    break
+        return positions
+
+    def suggest(self, query, limit=10, ranking='degree'):
+        """以 query 为前缀的实体，按重要性从高到低"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        positions = self.precomputed[ranking].get(prefix)
+        if positions is None:
+            lo, hi = self._range(prefix)
+            positions = self._top(lo, hi, ranking) if hi > lo else []
+
+        results = []
+        for position in positions[:limit]:
+            i = int(self.key_nodes[position])
+            node = self.index.nodes[i]
+            result = {
+                'id': node['id'],
+                'name': node.get('name', ''),
+                'category': node.get('category'),
+                'degree': int(self.index.degree[i]),
+            }
+            if self.key_aliases[position] is not None:
+                result['alias'] = self.key_aliases[position]
+            results.append(result)
+        return results
@@ -0,0 +1,220 @@
+"""
+知识图谱的预计算索引
+每个图谱版本构建一次：CSR邻接表、度数、PageRank、节点重要性排序、社区划分以及社区间聚合边，
+用于分层级（level-of-detail）的图谱浏览：概览只返回最重要的N个节点和主要社区，再按需展开邻居或某个社区
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../../'))
+from modules.graph_analysis import label_propagation, cluster_summaries, pagerank, stable_ids
+
+RANKINGS = ('degree', 'pagerank')
+
+
+class GraphIndex:
+    """前端格式图谱 {nodes, links, sents, categories} 上的只读索引"""
+
+    def __init__(self, data):
+        self.data = data
+        self.nodes = data.get('nodes', [])
+        self.links = data.get('links', [])
+        self.sents = data.get('sents', {})
+        n = self.num_nodes = len(self.nodes)
+
+        # 节点id可以是任意可哈希值，内部统一使用下标
+        self.id_to_index = {node['id']: i for i, node in enumerate(self.nodes)}
+        valid = [(self.id_to_index[link['source']], self.id_to_index[link['target']], e)
+                 for e, link in enumerate(self.links)
+                 if link['source'] in self.id_to_index and link['target'] in self.id_to_index]
+        edges = np.array(valid, dtype=np.int64).reshape(-1, 3)
+        self.edge_src, self.edge_dst, self.edge_ids = edges[:, 0], edges[:, 1], edges[:, 2]
+
+        # 无向CSR：每条边在两个端点各出现一次，邻接项同时记录原始边下标
+        rows = np.concatenate([self.edge_src, self.edge_dst])
+        cols = np.concatenate([self.edge_dst, self.edge_src])
+        order = np.argsort(rows, kind='stable')
+        self.indices = cols[order]
+        self.adj_edges = np.concatenate([self.edge_ids, self.edge_ids])[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+        # 离线布局写入的节点坐标（见 modules/graph_analysis.py），没有布局时为 None
+        self.positions = None
+        if n and all('x' in node and 'y' in node for node in self.nodes):
+            self.positions = np.array([(node['x'], node['y']) for node in self.nodes], dtype=np.float64)
+
+        # 跨版本不变的节点/边id，优先使用构建图谱时写入的 uid
+        if all('uid' in item for item in self.nodes + self.links):
+            self.node_uids = [node['uid'] for node in self.nodes]
+            self.link_uids = [link['uid'] for link in self.links]
+        else:
+            self.node_uids, self.link_uids = stable_ids(data)
+        self.uid_to_node = dict(zip(self.node_uids, range(n)))
+        self.uid_to_link = dict(zip(self.link_uids, range(len(self.links))))
+
+        self.degree = np.diff(self.indptr)
+        self.scores = {
+            'degree': self.degree.astype(np.float64),
+            'pagerank': pagerank(self.indptr, self.indices, n),
+        }
+        # 按重要性从高到低排列的节点下标，同分时按下标保持稳定
+        self.order = {name: np.argsort(-score, kind='stable') for name, score in self.scores.items()}
+
+        # 社区：优先使用构建图谱时离线计算的结果（见 modules/graph_analysis.py），没有时在此计算一次
+        if n and data.get('clusters') and all('cluster' in node for node in self.nodes):
+            cluster = np.array([node['cluster'] for node in self.nodes], dtype=np.int64)
+            summaries = data['clusters']
+        else:
+            cluster = label_propagation(self.indptr, self.indices)
+            summaries = cluster_summaries(cluster, self.degree, [node.get('name', '') for node in self.nodes])
+        self.set_clusters(cluster, summaries)
+
+    def set_clusters(self, cluster, summaries):
+        """设置节点所属的社区并预计算社区成员和社区间聚合边"""
+        self.cluster = cluster
+        self.clusters = {c['id']: c for c in summaries}
+        # 社区按规模从大到小
+        self.cluster_ranking = [c['id'] for c in sorted(summaries, key=lambda c: -c['size'])]
+        k = self.num_clusters = int(cluster.max()) + 1 if len(cluster) else 0
+
+        # 每个社区的成员按度数从高到低连续存放
+        self.cluster_members = np.lexsort((-self.degree, cluster))
+        sizes = np.bincount(cluster, minlength=k)
+        self.cluster_starts = np.concatenate([[0], np.cumsum(sizes)])
+
+        a, b = cluster[self.edge_src], cluster[self.edge_dst]
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        inter = lo != hi
+        keys, weights = np.unique(lo[inter] * k + hi[inter], return_counts=True)
+        order = np.argsort(-weights, kind='stable')
+        # 社区间聚合边，按权重从大到小
+        self.cluster_links = list(zip((keys[order] // k).tolist(), (keys[order] % k).tolist(), weights[order].tolist()))
+
+    def members(self, cluster_id):
+        """社区成员的节点下标，按度数从高到低"""
+        return self.cluster_members[self.cluster_starts[cluster_id]:self.cluster_starts[cluster_id + 1]]
+
+    def related_clusters(self, cluster_id, limit=10):
+        """与某个社区之间边数最多的其他社区"""
+        related = []
+        for a, b, weight in self.cluster_links:
+            if cluster_id in (a, b):
+                other = self.clusters.get(b if a == cluster_id else a)
+                if other is not None:
+                    related.append(dict(other, weight=weight))
+                    if len(related) >= limit:
+                        break
+        return related
+
+    def neighbors(self, i):
+        """节点的邻居下标及对应的原始边下标"""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.adj_edges[start:end]
+
+    def subgraph(self, selected, max_links=None):
+        """选中节点（下标数组）诱导出的子图，保持前端格式，边数超过 max_links 时截断"""
+        mask = np.zeros(self.num_nodes, dtype=bool)
+        mask[selected] = True
+        edge_mask = mask[self.edge_src] & mask[self.edge_dst]
+        edge_ids = self.edge_ids[edge_mask]
+        links_truncated = max_links is not None and len(edge_ids) > max_links
+        links = [self.links[e] for e in edge_ids[:max_links].tolist()]
+        sents = {}
+        for link in links:
+            key = str(link.get('sent'))
+            if key in self.sents:
+                sents[key] = self.sents[key]
+        return {
+            'nodes': [self.nodes[i] for i in np.asarray(selected).tolist()],
+            'links': links,
+            'sents': sents,
+            'categories': self.data.get('categories', []),
+            'links_truncated': links_truncated,
+        }
+
+    def overview(self, max_nodes, ranking='degree', max_links=None, max_clusters=50):
+        """最重要的 max_nodes 个节点及其之间的边，附带最大的若干社区及其之间的聚合边"""
+        top = self.order[ranking][:max_nodes]
+        graph = self.subgraph(top, max_links)
+        shown = self.cluster_ranking[:max_clusters]
+        shown_set = set(shown)
+        graph['clusters'] = [self.clusters[c] for c in shown]
+        graph['cluster_links'] = [{'source': a, 'target': b, 'weight': w}
+                                  for a, b, w in self.cluster_links if a in shown_set and b in shown_set]
+        graph['total_clusters'] = len(self.clusters)
+        graph['total_nodes'] = self.num_nodes
+        graph['total_links'] = len(self.edge_ids)
+        return graph
+
+    def expand(self, node_id, hops=1, limit=100, ranking='degree', max_links=None):
+        """从节点出发逐层展开 hops 跳邻居，每层优先保留重要性高的节点，总数不超过 limit"""
+        start = self.id_to_index.get(node_id)
+        if start is None:
+            return None
+        score = self.scores[ranking]
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        visited[start] = True
+        selected = [np.array([start])]
+        frontier = np.array([start])
+        remaining = limit - 1
+        truncated = False
+
+        for _ in range(hops):
+            if remaining <= 0 or not len(frontier):
+                break
+            spans = [self.indices[self.indptr[i]:self.indptr[i + 1]] for i in frontier.tolist()]
+            candidates = np.unique(np.concatenate(spans)) if spans else np.zeros(0, dtype=np.int64)
+            candidates = candidates[~visited[candidates]]
+            if len(candidates) > remaining:
+                truncated = True
+                candidates = candidates[np.argsort(-score[candidates], kind='stable')[:remaining]]
+            visited[candidates] = True
+            selected.append(candidates)
+            frontier = candidates
+            remaining -= len(candidates)
+
+        graph = self.subgraph(np.concatenate(selected), max_links)
+        graph['center'] = node_id
+        graph['truncated'] = truncated
+        graph['cluster'] = self.clusters.get(int(self.cluster[start]))
+        return graph
+
+    def changes(self, node_uids, link_uids):
+        """相对于旧版本（节点uid集合、边uid集合）新增和删除的节点与边"""
+        added_nodes = [dict(self.nodes[self.uid_to_node[uid]], uid=uid)
+                       for uid in self.node_uids if uid not in node_uids]
+        added_links = []
+        sents = {}
+        for uid in self.link_uids:
+            if uid in link_uids:
+                continue
+            link = self.links[self.uid_to_link[uid]]
+            source, target = self.id_to_index.get(link['source']), self.id_to_index.get(link['target'])
+            added_links.append(dict(link, uid=uid,
+                                    source_uid=self.node_uids[source] if source is not None else None,
+                                    target_uid=self.node_uids[target] if target is not None else None))
+            key = str(link.get('sent'))
+            if key in self.sents:
+                sents[key] = self.sents[key]
+        return {
+            'nodes': {'added': added_nodes, 'removed': sorted(set(node_uids) - self.uid_to_node.keys())},
+            'links': {'added': added_links, 'removed': sorted(set(link_uids) - self.uid_to_link.keys())},
+            'sents': sents,
+        }
+
+    def cluster_view(self, cluster_id, limit=100, ranking='degree', max_links=None):
+        """某个社区内最重要的 limit 个节点及其之间的边，附带相关社区"""
+        if cluster_id not in self.clusters:
+            return None
+        members = self.members(cluster_id)
+        if len(members) > limit:
+            members = members[np.argsort(-self.scores[ranking][members], kind='stable')[:limit]]
+        graph = self.subgraph(members, max_links)
+        graph['cluster'] = self.clusters[cluster_id]
+        graph['related'] = self.related_clusters(cluster_id)
+        graph['truncated'] = len(members) < self.clusters[cluster_id]['size']
+        return graph
@@ -0,0 +1,162 @@
+"""
+实体之间的关联路径查询
+在CSR邻接表上做双向BFS求最短路径，用 Yen 算法得到按跳数排序的前k条简单路径，
+每一跳附带关系名称和支撑句子，用于回答"X和Y有什么关系"一类的问题
+"""
+
+import heapq
+
+import numpy as np
+
+from app.utils.entity_search import normalize
+
+# 按名称模糊匹配实体时要求的最低分数
+RESOLVE_MIN_SCORE = 0.6
+
+
+def _expand(index, frontier, blocked):
+    """一层扩展：frontier 中各节点的 (邻居, 来源节点)"""
+    starts = index.indptr[frontier]
+    lengths = index.indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    neighbors = index.indices[np.repeat(starts, lengths) + within]
+    origins = np.repeat(frontier, lengths)
+    if blocked is not None:
+        keep = ~np.isin(origins * index.num_nodes + neighbors, blocked)
+        neighbors, origins = neighbors[keep], origins[keep]
+    return neighbors, origins
+
+
+def bidirectional_bfs(index, source, target, max_hops, blocked_nodes=(), blocked_pairs=()):
+    """source 到 target 的一条最短路径（节点下标列表），超过 max_hops 跳或不连通时返回 None
+
+    blocked_nodes 中的节点和 blocked_pairs 中的 (u, v) 边不可经过，供 Yen 算法使用
+    """
+    if source == target:
+        return [source]
+    n = index.num_nodes
+    blocked = None
+    if blocked_pairs:
+        pairs = np.array(list(blocked_pairs), dtype=np.int64).reshape(-1, 2)
+        blocked = np.concatenate([pairs[:, 0] * n + pairs[:, 1], pairs[:, 1] * n + pairs[:, 0]])
+
+    # 两侧的父节点和距离，-1 表示未访问
+    parent = [np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)]
+    dist = [np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)]
+    for side, start in ((0, source), (1, target)):
+        dist[side][start] = 0
+        parent[side][start] = start
+        if blocked_nodes:
+            dist[side][list(blocked_nodes)] = n  # 视为已访问，不再进入
+    frontier = [np.array([source]), np.array([target])]
+    depth = [0, 0]
+
+    while depth[0] + depth[1] < max_hops and len(frontier[0]) and len(frontier[1]):
+        # 先扩展较小的一侧
+        side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+        other = 1 - side
+        neighbors, origins = _expand(index, frontier[side], blocked)
+        fresh = dist[side][neighbors] == -1
+        neighbors, origins = neighbors[fresh], origins[fresh]
+        neighbors, first = np.unique(neighbors, return_index=True)
+        origins = origins[first]
+        depth[side] += 1
+        dist[side][neighbors] = depth[side]
+        parent[side][neighbors] = origins
+        frontier[side] = neighbors
+
+        met = neighbors[(dist[other][neighbors] >= 0) & (dist[other][neighbors] < n)]
+        if len(met):
+            meet = int(met[np.argmin(dist[other][met])])
+            forward, node = [], meet
+            while node != source:
+                forward.append(node)
+                node = int(parent[0][node])
+            backward, node = [], meet
+            while node != target:
+                node = int(parent[1][node])
+                backward.append(node)
+            return [source] + forward[::-1] + backward
+    return None
+
+
+def k_shortest_paths(index, source, target, k=3, max_hops=4):
+    """Yen 算法：按跳数从少到多的前 k 条简单路径"""
+    first = bidirectional_bfs(index, source, target, max_hops)
+    if first is None:
+        return []
+    paths = [first]
+    candidates = []
+    seen = {tuple(first)}
+
+    while len(paths) < k:
+        previous = paths[-1]
+        for i in range(len(previous) - 1):
+            root = previous[:i + 1]
+            blocked_pairs = {(p[i], p[i + 1]) for p in paths if len(p) > i + 1 and p[:i + 1] == root}
+            spur = bidirectional_bfs(index, root[-1], target, max_hops - i,
+                                     blocked_nodes=set(root[:-1]), blocked_pairs=blocked_pairs)
+            if spur is None:
+                continue
+            path = root[:-1] + spur
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (len(path), path))
+        if not candidates:
+            break
+        paths.append(heapq.heappop(candidates)[1])
+    return paths
+
+
+def describe_path(index, path, sentence_limit=200):
+    """路径上每一跳的关系名称、方向和支撑句子"""
+    hops = []
+    for u, v in zip(path, path[1:]):
+        neighbors, edges = index.neighbors(u)
+        link = index.links[int(edges[np.nonzero(neighbors == v)[0][0]])]
+        sent_key = str(link.get('sent'))
+        hops.append({
+            'source': link['source'],
+            'target': link['target'],
+            'relation': link.get('name', ''),
+            'sent': link.get('sent'),
+            'sentence': index.sents.get(sent_key, '')[:sentence_limit],
+        })
+    nodes = [{'id': index.nodes[i]['id'], 'name': index.nodes[i].get('name', '')} for i in path]
+    names = {node['id']: node['name'] for node in nodes}
+    description = nodes[0]['name']
+    for hop, node in zip(hops, nodes[1:]):
+        arrow = f"-[{hop['relation']}]->" if hop['target'] == node['id'] else f"<-[{hop['relation']}]-"
+        description += f" {arrow} {names[node['id']]}"
+    return {'length': len(hops), 'nodes': nodes, 'hops': hops, 'description': description}
+
+
+def resolve_node(snapshot, query):
+    """按节点id、规范化后的名称或模糊检索结果定位节点下标"""
+    index = snapshot.index
+    if query is None:
+        return None
+    text = str(query).strip()
+    if text.lstrip('-').isdigit() and int(text) in index.id_to_index:
+        return index.id_to_index[int(text)]
+    if text in index.id_to_index:
+        return index.id_to_index[text]
+    exact = snapshot.search.exact.get(normalize(text))
+    if exact is not None:
+        return exact
+    results = snapshot.search.search(text, limit=1, preview=0)
+    if results and results[0]['score'] >= RESOLVE_MIN_SCORE:
+        return index.id_to_index[results[0]['id']]
+    return None
+
+
+def find_relation_paths(snapshot, source, target, k=3, max_hops=4):
+    """两个实体（id或名称）之间的前 k 条关联路径，实体无法定位时返回 None"""
+    s, t = resolve_node(snapshot, source), resolve_node(snapshot, target)
+    if s is None or t is None:
+        return None
+    index = snapshot.index
+    return [describe_path(index, path) for path in k_shortest_paths(index, s, t, k=k, max_hops=max_hops)]
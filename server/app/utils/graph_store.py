@@ -0,0 +1,181 @@
+"""
+知识图谱的内存存储
+图谱文件按版本加载一次：解析后的数据、序列化好的响应字节及其 gzip/brotli 压缩版本都缓存在快照中，
+文件变化（修改时间或大小改变）时自动重新加载，请求只需一次 stat 调用即可拿到当前版本。
+每个加载过的版本保留一份节点/边 uid 清单（内存中有上限，并可写入磁盘），客户端可以按版本获取增量变化
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app import config
+from app.utils.entity_search import EntitySearchIndex, EntitySuggestIndex
+from app.utils.graph_index import GraphIndex
+from app.utils.logger import logger
+
+try:
+    import brotli
+except ImportError:  # requirements.txt 中包含 brotli；未安装时只提供 gzip，首次加载图谱时给出警告
+    brotli = None
+
+
+class GraphSnapshot:
+    """某一版本图谱的只读快照"""
+
+    def __init__(self, path, data, message, raw, mtime):
+        self.path = path
+        self.data = data
+        self.message = message
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self.version = hashlib.sha1(raw).hexdigest()[:16]
+        self.index = GraphIndex(data)
+        # 没有 uid 字段的旧图谱文件，uid 只在索引中计算：写回返回的数据，客户端才能用 /graph/changes 的增量对应到节点和边
+        for node, uid in zip(self.index.nodes, self.index.node_uids):
+            node['uid'] = uid
+        for link, uid in zip(self.index.links, self.index.link_uids):
+            link['uid'] = uid
+        self.search = EntitySearchIndex(self.index)
+        self.suggest = EntitySuggestIndex(self.index, top_k=config.GRAPH_SUGGEST_TOP_K)
+
+        # GET /graph/ 的完整响应体，只序列化一次
+        self.payload = json.dumps({'data': data, 'message': message},
+                                  ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.encodings = {'gzip': gzip.compress(self.payload, config.GRAPH_GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(self.payload, quality=config.GRAPH_BROTLI_QUALITY)
+
+    def body(self, encoding=None):
+        """指定编码的响应体，encoding 为 None 时返回未压缩版本"""
+        if encoding is None:
+            return self.payload
+        return self.encodings[encoding]
+
+    def info(self):
+        return {
+            'version': self.version,
+            'path': self.path,
+            'nodes': len(self.data.get('nodes', [])),
+            'links': len(self.data.get('links', [])),
+            'has_layout': self.index.positions is not None,
+            'bytes': len(self.payload),
+            'encoded_bytes': {name: len(body) for name, body in self.encodings.items()},
+        }
+
+
+class GraphStore:
+    """按文件版本缓存的图谱存储，依次尝试候选路径"""
+
+    def __init__(self, paths, history_versions=10, history_dir=None):
+        self.paths = paths
+        self.history_versions = history_versions
+        self.history_dir = history_dir
+        self._snapshot = None
+        self._stat = None
+        self._lock = threading.Lock()
+        # 版本 -> (节点uid集合, 边uid集合)，最近加载的版本在最后
+        self._manifests = OrderedDict()
+        self._changes_cache = OrderedDict()
+
+    def _locate(self):
+        for path, message in self.paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return path, message, (path, st.st_mtime_ns, st.st_size)
+        raise FileNotFoundError(f"未找到图谱文件: {', '.join(p for p, _ in self.paths)}")
+
+    def current(self):
+        """当前版本的快照，文件变化时重新加载"""
+        path, message, stat = self._locate()
+        if stat == self._stat:
+            return self._snapshot
+
+        with self._lock:
+            if stat != self._stat:
+                if brotli is None and self._snapshot is None:
+                    logger.warning("⚠️ [GRAPH_STORE] 未安装 brotli，GET /graph/ 只提供 gzip 压缩版本（pip install brotli）")
+                start = time.perf_counter()
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                snapshot = GraphSnapshot(path, json.loads(raw), message, raw, stat[1] / 1e9)
+                self._remember(snapshot)
+                self._snapshot, self._stat = snapshot, stat
+                logger.info("📊 [GRAPH_STORE] 加载图谱 %s 版本 %s, 用时 %.2fs, 大小 %s",
+                            path, snapshot.version, time.perf_counter() - start,
+                            {'raw': len(snapshot.payload), **{k: len(v) for k, v in snapshot.encodings.items()}})
+            return self._snapshot
+
+    def _manifest_path(self, version):
+        return os.path.join(self.history_dir, f"{version}.json")
+
+    def _remember(self, snapshot):
+        """记录版本清单，超出数量上限时淘汰最旧的版本"""
+        index = snapshot.index
+        self._manifests[snapshot.version] = (frozenset(index.node_uids), frozenset(index.link_uids))
+        self._manifests.move_to_end(snapshot.version)
+        while len(self._manifests) > self.history_versions:
+            self._manifests.popitem(last=False)
+        if not self.history_dir:
+            return
+
+        try:
+            os.makedirs(self.history_dir, exist_ok=True)
+            path = self._manifest_path(snapshot.version)
+            if not os.path.exists(path):
+                tmp = f"{path}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'version': snapshot.version, 'created': time.time(),
+                               'nodes': index.node_uids, 'links': index.link_uids}, f, separators=(',', ':'))
+                os.replace(tmp, path)
+            else:
+                os.utime(path)
+            files = sorted((os.path.join(self.history_dir, name) for name in os.listdir(self.history_dir)
+                            if name.endswith('.json')), key=os.path.getmtime, reverse=True)
+            for old in files[self.history_versions:]:
+                os.remove(old)
+        except OSError as e:
+            logger.warning("⚠️ [GRAPH_STORE] 保存版本清单失败: %s", e)
+
+    def _manifest(self, version):
+        """某个历史版本的 uid 清单，内存中没有时从磁盘读取，未知版本返回 None"""
+        manifest = self._manifests.get(version)
+        if manifest is not None or not self.history_dir or not version.isalnum():
+            return manifest
+        try:
+            with open(self._manifest_path(version), encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return frozenset(saved['nodes']), frozenset(saved['links'])
+
+    def changes(self, since):
+        """从 since 版本到当前版本新增和删除的节点与边，since 未知或已被淘汰时返回 None"""
+        snapshot = self.current()
+        key = (since, snapshot.version)
+        cached = self._changes_cache.get(key)
+        if cached is not None:
+            return cached
+
+        manifest = self._manifest(since)
+        if manifest is None:
+            return None
+        diff = {'since': since, 'version': snapshot.version, **snapshot.index.changes(*manifest)}
+        with self._lock:
+            self._changes_cache[key] = diff
+            while len(self._changes_cache) > self.history_versions:
+                self._changes_cache.popitem(last=False)
+        return diff
+
+
+# 全局图谱存储：优先使用CCUS图谱，不存在时使用原始数据
+graph_store = GraphStore([
+    (config.GRAPH_DATA_PATH, 'CCUS Knowledge Graph Loaded!'),
+    (config.GRAPH_FALLBACK_PATH, 'Fallback Data Loaded!'),
+], history_versions=config.GRAPH_HISTORY_VERSIONS, history_dir=config.GRAPH_HISTORY_DIR)
@@ -1,6 +1,8 @@
 import json
 import re
 
+from app.utils.logger import logger
+
 
 def clean_text_for_json(text):
     """清理文本以确保JSON序列化安全"""
@@ -28,24 +30,31 @@ def clean_text_for_json(text):
 
     return text
 
-def search_node_item(user_input, lite_graph=None):
-    """CCUS领域知识图谱检索功能"""
-    import os
+def search_node_item(user_input, lite_graph=None, data=None):
+    """CCUS领域知识图谱检索功能
 
-    # 确保正确的数据文件路径
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(current_dir, '..', '..', 'data', 'data.json')
+    Args:
+        user_input: 检索词
+        lite_graph: 已有的子图，检索结果会合并进去
+        data: 完整图谱，为None时从 server/data/data.json 加载
+    """
+    import os
 
-    try:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print(f"📊 Loaded knowledge graph with {len(data.get('nodes', []))} nodes and {len(data.get('links', []))} edges")
-    except FileNotFoundError:
-        print(f"⚠️  CCUS knowledge graph not found at {data_path}")
-        return None
-    except json.JSONDecodeError:
-        print(f"❌ Invalid JSON format in {data_path}")
-        return None
+    if data is None:
+        # 确保正确的数据文件路径
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        data_path = os.path.join(current_dir, '..', '..', 'data', 'data.json')
+
+        try:
+            with open(data_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            logger.debug("📊 Loaded knowledge graph with %d nodes and %d edges", len(data.get('nodes', [])), len(data.get('links', [])))
+        except FileNotFoundError:
+            logger.warning("⚠️  CCUS knowledge graph not found at %s", data_path)
+            return None
+        except json.JSONDecodeError:
+            logger.error("❌ Invalid JSON format in %s", data_path)
+            return None
 
     if lite_graph is None:
         lite_graph = {
@@ -76,8 +85,7 @@ def search_node_item(user_input, lite_graph=None):
         if key in user_lower:
             search_terms.extend(synonyms)
 
-    print(f"🔍 CCUS graph search for: {user_input}")
-    print(f"📝 Extended search terms: {search_terms}")
+    logger.debug("🔍 CCUS graph search for: %s, extended search terms: %s", user_input, search_terms)
 
     found_nodes = set()
 
@@ -149,7 +157,7 @@ def search_node_item(user_input, lite_graph=None):
         if len(lite_graph['nodes']) == 0:
             break
 
-    print(f"✅ CCUS graph search complete: {len(lite_graph['nodes'])} nodes, {len(lite_graph['links'])} edges")
+    logger.debug("✅ CCUS graph search complete: %d nodes, %d edges", len(lite_graph['nodes']), len(lite_graph['links']))
     return lite_graph if len(lite_graph['nodes']) > 0 else None
 
 def _is_ccus_match(search_term, node_name):
@@ -5,6 +5,10 @@
 
 import json
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../../'))
+from modules.graph_analysis import add_layout, add_communities, add_stable_ids
 
 
 class KnowledgeGraphConverter:
@@ -17,13 +21,14 @@ class KnowledgeGraphConverter:
         self.sents = []     # 句子列表
         self.categories = [] # 类别列表
 
-    def convert_spn_to_frontend(self, spn_data_path, output_path):
+    def convert_spn_to_frontend(self, spn_data_path, output_path, layout=True):
         """
         将SPN4RE格式转换为前端格式
 
         Args:
             spn_data_path: SPN4RE格式的知识图谱文件路径
             output_path: 输出的前端格式文件路径
+            layout: 是否预计算节点坐标和社区划分，前端可直接按坐标渲染
         """
         print(f"🔄 Converting knowledge graph from {spn_data_path} to {output_path}")
 
@@ -95,6 +100,11 @@ class KnowledgeGraphConverter:
             "categories": self.categories
         }
 
+        if layout:
+            add_layout(output_data)
+            add_communities(output_data)
+        add_stable_ids(output_data)
+
         # 保存到文件
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -0,0 +1,127 @@
+"""
+对话语言模型后端
+统一的流式生成接口：stream(prompt, history) 逐次产出截至当前的完整回答文本，
+与 ChatGLM stream_chat 的语义一致，便于在不同后端之间切换
+"""
+
+import math
+import random
+import time
+import zlib
+
+
+class LLMBackend:
+    """对话语言模型后端基类"""
+
+    name = "base"
+
+    @property
+    def available(self):
+        """后端是否可用于生成"""
+        return True
+
+    def stream(self, prompt, history):
+        """流式生成回答
+
+        Args:
+            prompt: 输入给模型的文本
+            history: 对话历史 [(query, response), ...]
+        Yields:
+            截至当前的完整回答文本
+        """
+        raise NotImplementedError
+
+
+class ChatGLMBackend(LLMBackend):
+    """基于 SimpleChatGLM 的后端"""
+
+    name = "chatglm"
+
+    def __init__(self, chat_glm):
+        self.chat_glm = chat_glm
+
+    @property
+    def available(self):
+        return self.chat_glm is not None and self.chat_glm.loaded
+
+    def stream(self, prompt, history):
+        for response, _ in self.chat_glm.stream_chat(prompt, history):
+            yield response
+
+
+class StubBackend(LLMBackend):
+    """确定性的本地替身后端，不依赖GPU和模型权重
+
+    按配置的首字延迟分布和生成速率输出由 prompt 决定的固定文本，
+    用于在CPU环境下对检索和服务链路做压测和性能分析
+    """
+
+    name = "stub"
+
+    VOCABULARY = [
+        "CCUS", "碳捕集", "二氧化碳", "地质封存", "驱油", "燃煤电厂", "钢铁", "化工",
+        "技术", "成本", "能耗", "效率", "示范项目", "政策", "减排", "规模",
+        "吸收法", "吸附法", "膜分离", "管道运输", "咸水层", "利用", "转化", "储存",
+        "是", "的", "在", "与", "通过", "可以", "主要", "包括", "，", "。",
+    ]
+
+    def __init__(self, token_rate=20.0, first_token_latency=0.2, latency_jitter=0.0,
+                 latency_distribution="fixed", max_tokens=64, chunk_tokens=4, seed=0):
+        """
+        Args:
+            token_rate: 每秒生成的token数，<=0表示不限速
+            first_token_latency: 首个token的平均延迟（秒）
+            latency_jitter: 延迟的离散程度，fixed分布下忽略
+            latency_distribution: fixed / uniform / lognormal
+            max_tokens: 每次回答生成的token数
+            chunk_tokens: 每次产出包含的token数
+            seed: 随机种子，相同种子和输入得到相同输出与延迟
+        """
+        self.token_rate = token_rate
+        self.first_token_latency = first_token_latency
+        self.latency_jitter = latency_jitter
+        self.latency_distribution = latency_distribution
+        self.max_tokens = max_tokens
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.seed = seed
+
+    def _rng(self, prompt, history):
+        key = f"{self.seed}|{len(history or [])}|{prompt}".encode("utf-8")
+        return random.Random(zlib.crc32(key))
+
+    def _first_token_delay(self, rng):
+        mean = max(0.0, self.first_token_latency)
+        if self.latency_distribution == "uniform":
+            return max(0.0, rng.uniform(mean - self.latency_jitter, mean + self.latency_jitter))
+        if self.latency_distribution == "lognormal" and mean > 0:
+            sigma = max(0.0, self.latency_jitter)
+            # 使对数正态分布的均值等于 first_token_latency
+            return rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+        return mean
+
+    def stream(self, prompt, history):
+        rng = self._rng(prompt, history)
+        time.sleep(self._first_token_delay(rng))
+
+        tokens = [rng.choice(self.VOCABULARY) for _ in range(self.max_tokens)]
+        interval = self.chunk_tokens / self.token_rate if self.token_rate > 0 else 0.0
+
+        response = ""
+        for start in range(0, len(tokens), self.chunk_tokens):
+            if start > 0 and interval > 0:
+                time.sleep(interval)
+            response += "".join(tokens[start:start + self.chunk_tokens])
+            yield response
+
+
+BACKENDS = {
+    ChatGLMBackend.name: ChatGLMBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def create_backend(name, **kwargs):
+    """根据名称创建后端实例"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name}, available: {list(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
@@ -3,6 +3,8 @@ import json
 import os
 import re
 
+from app.utils.logger import logger
+
 class Ner:
     """CCUS领域命名实体识别模块"""
 
@@ -114,7 +116,7 @@ class Ner:
         # 3. 去重和过滤
         filtered_entities = self._filter_entities(entities)
 
-        print(f"🔍 CCUS NER result for '{text}': {filtered_entities}")
+        logger.debug("🔍 CCUS NER result for '%s': %s", text, filtered_entities)
         return filtered_entities[:8]  # 返回最多8个实体
 
     def _extract_dict_entities(self, text):
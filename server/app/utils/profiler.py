@@ -0,0 +1,238 @@
+"""
+按需请求性能分析
+- 单个请求：带 X-Profile 请求头时用 cProfile 分析该请求（包括流式响应的生成过程），保存为 .prof
+- 一段时间内的所有请求：由管理接口启动采样分析器，定期采集所有线程的调用栈，保存为 collapsed-stack 文件
+每个分析结果同时保存一份按累计耗时排序的热点函数摘要
+总开关 PROFILING_ENABLED 关闭时不注册任何请求钩子，对请求处理没有额外开销
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import g, request
+
+from app import config
+from app.utils.logger import logger
+
+PROFILE_HEADER = 'X-Profile'
+
+
+class ProfileStore:
+    """分析结果的存储，只保留最近的若干份"""
+
+    def __init__(self, profile_dir, keep=20):
+        self.profile_dir = profile_dir
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def new_id(self, kind):
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{kind}-{uuid.uuid4().hex[:6]}"
+
+    def path(self, profile_id, ext):
+        return os.path.join(self.profile_dir, f"{profile_id}.{ext}")
+
+    def _save(self, profile_id, ext, data, summary):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with self._lock:
+            if ext == 'prof':
+                data.dump_stats(self.path(profile_id, ext))
+            else:
+                with open(self.path(profile_id, ext), 'w', encoding='utf-8') as f:
+                    f.write(data)
+            with open(self.path(profile_id, 'json'), 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            self._cleanup()
+        return profile_id
+
+    def save_cprofile(self, profile, meta, profile_id=None, top=30):
+        profile_id = profile_id or self.new_id('request')
+        summary = dict(meta, id=profile_id, kind='cprofile', format='prof',
+                       top_functions=summarize_cprofile(profile, top))
+        return self._save(profile_id, 'prof', profile, summary)
+
+    def save_collapsed(self, stacks, meta, top=30):
+        profile_id = self.new_id('window')
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        summary = dict(meta, id=profile_id, kind='sampling', format='collapsed',
+                       top_functions=summarize_collapsed(stacks, top))
+        return self._save(profile_id, 'collapsed', collapsed, summary)
+
+    def list(self):
+        if not os.path.isdir(self.profile_dir):
+            return []
+        ids = sorted(name[:-5] for name in os.listdir(self.profile_dir) if name.endswith('.json'))
+        return list(reversed(ids))
+
+    def summary(self, profile_id):
+        path = self.path(profile_id, 'json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _cleanup(self):
+        for profile_id in self.list()[self.keep:]:
+            for ext in ('json', 'prof', 'collapsed'):
+                if os.path.exists(self.path(profile_id, ext)):
+                    os.remove(self.path(profile_id, ext))
+
+
+def summarize_cprofile(profile, top):
+    """cProfile 结果中累计耗时最高的函数"""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "ncalls": nc,
+            "tottime": round(tt, 6),
+            "cumtime": round(ct, 6),
+        })
+    rows.sort(key=lambda r: r["cumtime"], reverse=True)
+    return rows[:top]
+
+
+def summarize_collapsed(stacks, top):
+    """采样结果中包含样本最多的函数（累计）及其自身样本数"""
+    total = sum(stacks.values()) or 1
+    inclusive, self_samples = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        for frame in set(frames):
+            inclusive[frame] += count
+        self_samples[frames[-1]] += count
+    return [{
+        "function": frame,
+        "samples": count,
+        "cumulative_ratio": round(count / total, 4),
+        "self_ratio": round(self_samples[frame] / total, 4),
+    } for frame, count in inclusive.most_common(top)]
+
+
+class SamplingProfiler:
+    """在后台线程中定期采集所有线程的调用栈"""
+
+    def __init__(self, store, interval=0.005):
+        self.store = store
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self.until = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds):
+        if self.running:
+            return False
+        self._stop.clear()
+        self.until = time.time() + seconds
+        self._thread = threading.Thread(target=self._run, args=(seconds,), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, seconds):
+        own_ident = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.time()
+        while not self._stop.is_set() and time.time() < self.until:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stacks[";".join(reversed(stack))] += 1
+            samples += 1
+            self._stop.wait(self.interval)
+
+        profile_id = self.store.save_collapsed(stacks, {
+            "started_at": round(started, 3),
+            "duration": round(time.time() - started, 3),
+            "requested_seconds": seconds,
+            "interval": self.interval,
+            "sample_rounds": samples,
+        })
+        logger.info("🔬 [PROFILER] 采样分析完成: %s", profile_id)
+
+
+class RequestProfiler:
+    """单请求 cProfile 分析，同一时间只分析一个请求"""
+
+    def __init__(self, store, token=''):
+        self.store = store
+        self.token = token
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _requested(self):
+        value = request.headers.get(PROFILE_HEADER)
+        if not value:
+            return False
+        return not self.token or value == self.token
+
+    def _before_request(self):
+        if not self._requested() or not self._lock.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        g.profile = profile
+        g.profile_id = self.store.new_id('request')
+        g.profile_started = time.time()
+        profile.enable()
+
+    def _after_request(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+
+        profile_id = g.profile_id
+        meta = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "started_at": round(g.profile_started, 3),
+        }
+
+        def finish():
+            # 流式响应在 after_request 之后才生成，需要在响应关闭时结束分析
+            profile.disable()
+            self._lock.release()
+            meta["duration"] = round(time.time() - meta["started_at"], 6)
+            self.store.save_cprofile(profile, meta, profile_id)
+            logger.info("🔬 [PROFILER] 请求分析完成: %s %s -> %s", meta["method"], meta["path"], profile_id)
+
+        response.call_on_close(finish)
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    def _teardown_request(self, exc):
+        # 视图抛出未处理异常时 after_request 不会执行，在这里结束分析
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
+            self._lock.release()
+
+
+# 全局实例
+profile_store = ProfileStore(config.PROFILE_DIR, keep=config.PROFILE_KEEP)
+sampling_profiler = SamplingProfiler(profile_store, interval=config.PROFILE_SAMPLE_INTERVAL)
+request_profiler = RequestProfiler(profile_store, token=config.PROFILING_TOKEN)
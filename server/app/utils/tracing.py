@@ -0,0 +1,227 @@
+"""
+对话流程的分阶段追踪
+记录每个请求在NER、图谱检索、外部检索、结构化、prompt构建、首字和生成各阶段的耗时，
+汇总为延迟直方图和计数器（Prometheus文本格式），并把每个请求的追踪记录写入滚动日志文件
+追踪关闭时 start() 返回空实现，不产生任何计时和记录开销
+"""
+
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import uuid
+
+from app import config
+
+# 延迟直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _NullTrace:
+    """追踪关闭时使用的空实现"""
+
+    trace_id = None
+
+    def span(self, name):
+        return NULL_SPAN
+
+    def add(self, name, seconds):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def finish(self, status="ok"):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+NULL_TRACE = _NullTrace()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Trace:
+    """单个请求的追踪记录"""
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+        self.spans = {}
+        self.attrs = {}
+        self.finished = False
+
+    def span(self, name):
+        """用于 with 语句的阶段计时"""
+        return _Span(self, name)
+
+    def add(self, name, seconds):
+        """直接记录某个阶段的耗时，同名阶段累加"""
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def finish(self, status="ok"):
+        if self.finished:
+            return
+        self.finished = True
+        self.tracer._record(self, status, time.perf_counter() - self.start)
+
+
+class Histogram:
+    """按标签区分的累积直方图"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.series = {}  # label -> [bucket_counts, sum, count]
+
+    def observe(self, label, value):
+        series = self.series.get(label)
+        if series is None:
+            series = self.series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, name, label_name, help_text):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for label, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{label_name}="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_name}="{label}"}} {total:.6f}')
+            lines.append(f'{name}_count{{{label_name}="{label}"}} {count}')
+        return lines
+
+
+class Tracer:
+    """追踪记录的汇总与输出"""
+
+    def __init__(self, enabled=True, trace_file=None, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stage_histogram = Histogram()
+        self.request_histogram = Histogram()
+        self.counters = {}  # (name, ((label, value), ...)) -> value
+        self._trace_logger = self._build_trace_logger(trace_file, max_bytes, backup_count) if enabled else None
+
+    @staticmethod
+    def _build_trace_logger(trace_file, max_bytes, backup_count):
+        if not trace_file:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(trace_file)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            trace_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger = logging.getLogger("server.trace")
+        trace_logger.handlers = [handler]
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+        return trace_logger
+
+    def start(self, name):
+        """开始一个请求的追踪"""
+        if not self.enabled:
+            return NULL_TRACE
+        return Trace(self, name)
+
+    def incr(self, name, value=1, **labels):
+        """累加计数器"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def _record(self, trace, status, total):
+        with self._lock:
+            for stage, seconds in trace.spans.items():
+                self.stage_histogram.observe(stage, seconds)
+            self.request_histogram.observe(trace.name, total)
+            key = ("requests_total", (("endpoint", trace.name), ("status", status)))
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+        if self._trace_logger is not None:
+            self._trace_logger.info(json.dumps({
+                "trace_id": trace.trace_id,
+                "ts": round(trace.timestamp, 3),
+                "name": trace.name,
+                "status": status,
+                "total": round(total, 6),
+                "spans": {k: round(v, 6) for k, v in trace.spans.items()},
+                "attrs": trace.attrs,
+            }, ensure_ascii=False))
+
+    def render_prometheus(self):
+        """以Prometheus文本格式输出汇总指标"""
+        with self._lock:
+            lines = self.stage_histogram.render(
+                "ccus_chat_stage_duration_seconds", "stage", "Duration of each chat pipeline stage")
+            lines += self.request_histogram.render(
+                "ccus_request_duration_seconds", "endpoint", "Total duration of traced requests")
+
+            by_name = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                by_name.setdefault(name, []).append((labels, value))
+            for name, series in by_name.items():
+                lines.append(f"# TYPE ccus_{name} counter")
+                for labels, value in series:
+                    label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"ccus_{name}{{{label_str}}} {value}" if label_str else f"ccus_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def format_gauges(prefix, values, help_text=""):
+    """把数值字典格式化为Prometheus gauge，非数值项跳过"""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+# 全局追踪实例
+tracer = Tracer(
+    enabled=config.TRACE_ENABLED,
+    trace_file=config.TRACE_FILE,
+    max_bytes=config.TRACE_FILE_MAX_BYTES,
+    backup_count=config.TRACE_FILE_BACKUPS
+)
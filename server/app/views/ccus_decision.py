@@ -1,42 +1,80 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import glob
+import json
+import re
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../../'))
 
-from modules.ccus_decision_engine import CCUSDecisionEngine
+from app import config
+from modules.ccus_decision_engine import DecisionEngineRegistry
 
 mod = Blueprint('ccus_decision', __name__, url_prefix='/api/ccus')
 
-# 初始化决策引擎
-decision_engine = None
+# 决策引擎：按知识图谱版本管理，新的迭代结果在后台加载后自动切换
+engine_registry = None
 
-def init_decision_engine():
-    """初始化CCUS决策引擎"""
-    global decision_engine
 
-    # 尝试多个可能的知识图谱路径
-    possible_paths = [
+def knowledge_graph_paths():
+    """按优先级排列的候选知识图谱路径，迭代结果中版本号最大的优先"""
+    iterations = glob.glob("data/ccus_v1/iteration_v*/knowledge_graph.json")
+    iterations.sort(key=lambda p: int(re.search(r'iteration_v(\d+)', p).group(1)), reverse=True)
+    return [
         "data/ccus_v1/knowledge_graph.json",
-        "data/ccus_v1/iteration_v0/knowledge_graph.json",
+        *iterations,
         "data/ccus_v1/base_refined.json",
         "data/ccus_v1/base_filtered.json",
         "data/ccus_v1/base.json"
     ]
 
-    kg_path = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            kg_path = path
-            break
+def init_decision_engine():
+    """初始化CCUS决策引擎"""
+    global engine_registry
+
+    engine_registry = DecisionEngineRegistry(knowledge_graph_paths,
+                                             keep=config.DECISION_KG_KEEP_VERSIONS,
+                                             cache_size=config.DECISION_CACHE_SIZE)
+    kg_path = engine_registry.locate()
 
     if kg_path:
-        decision_engine = CCUSDecisionEngine(kg_path)
+        engine_registry.load(kg_path)
         print(f"CCUS决策引擎初始化成功，使用知识图谱: {kg_path}")
     else:
         # 即使没有知识图谱文件也初始化引擎，它会返回示例数据
-        decision_engine = CCUSDecisionEngine("data/ccus_v1/knowledge_graph.json")
+        engine_registry.load("data/ccus_v1/knowledge_graph.json")
         print("CCUS决策引擎初始化（使用示例数据）")
 
+    if config.DECISION_KG_POLL_INTERVAL > 0:
+        engine_registry.start_watcher(config.DECISION_KG_POLL_INTERVAL)
+
+def parse_limit(data, default=5):
+    """请求中的返回数量，返回 (数量, 错误响应)，超过 DECISION_MAX_LIMIT 时截断"""
+    limit = data.get('limit', default) if isinstance(data, dict) else default
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+        return None, (jsonify({
+            "error": "limit 必须是正整数",
+            "status": "error"
+        }), 400)
+    return min(limit, config.DECISION_MAX_LIMIT), None
+
+def select_engine():
+    """按 ?kg_version= 选择决策引擎，未指定时使用当前版本，返回 (引擎, 错误响应)"""
+    if engine_registry is None or engine_registry.current is None:
+        return None, (jsonify({
+            "error": "决策引擎未初始化，请先完成知识图谱构建",
+            "status": "error"
+        }), 500)
+
+    version = request.args.get('kg_version')
+    engine = engine_registry.get(version)
+    if engine is None:
+        return None, (jsonify({
+            "error": f"知识图谱版本不存在: {version}",
+            "available_versions": [v["kg_version"] for v in engine_registry.versions()],
+            "status": "error"
+        }), 404)
+    return engine, None
+
 @mod.route('/decision', methods=['POST'])
 def get_ccus_recommendation():
     """CCUS技术推荐API
@@ -56,15 +94,19 @@ def get_ccus_recommendation():
             "技术成熟度": "商业化",
             "投资预算": "10亿元",
             "适用行业": ["钢铁", "电力"]
-        }
+        },
+        "limit": 5,
+        "ranking": "score"
     }
+
+    ranking 为 "score"（默认，按适用性评分）或 "pareto"（按适用性、成熟度、投资金额和效率的 Pareto 前沿，
+    另外返回 front_size 和各目标单独排序的 best_by_objective）。
+    可以通过 ?kg_version= 指定知识图谱版本（见 /api/ccus/versions）
     """
 
-    if decision_engine is None:
-        return jsonify({
-            "error": "决策引擎未初始化，请先完成知识图谱构建",
-            "status": "error"
-        }), 500
+    engine, error = select_engine()
+    if error:
+        return error
 
     try:
         data = request.get_json() or {}
@@ -72,42 +114,119 @@ def get_ccus_recommendation():
         region_info = data.get('region_info', {})
         policy_context = data.get('policy_context', {})
         preferences = data.get('preferences', {})
+        limit, error = parse_limit(data)
+        if error:
+            return error
+        ranking = data.get('ranking', 'score')
+        if ranking not in ('score', 'pareto'):
+            return jsonify({
+                "error": "ranking 必须是 score 或 pareto",
+                "status": "error"
+            }), 400
 
-        recommendations = decision_engine.recommend_technologies(
-            region_info, policy_context, preferences
-        )
+        extra = {}
+        if ranking == 'pareto':
+            result = engine.recommend_pareto(region_info, policy_context, preferences, limit)
+            recommendations = result["recommendations"]
+            extra = {"front_size": result["front_size"], "best_by_objective": result["best_by_objective"]}
+        else:
+            recommendations = engine.recommend_technologies(
+                region_info, policy_context, preferences, limit
+            )
 
         return jsonify({
             "status": "success",
+            "kg_version": engine.kg_version,
+            "ranking": ranking,
             "recommendations": recommendations,
             "total_count": len(recommendations),
+            **extra,
             "region_info": region_info,
             "policy_context": policy_context,
             "preferences": preferences
         })
 
+    except ValueError as e:
+        return jsonify({
+            "error": f"请求条件不合法: {str(e)}",
+            "status": "error"
+        }), 400
+
     except Exception as e:
         return jsonify({
             "error": f"推荐过程中发生错误: {str(e)}",
             "status": "error"
         }), 500
 
+@mod.route('/decision/batch', methods=['POST'])
+def get_ccus_batch_recommendation():
+    """批量CCUS技术推荐API，结果以NDJSON逐行返回
+
+    请求格式:
+    {
+        "scenarios": [
+            {"id": "山东-钢铁", "region_info": {...}, "policy_context": {...}, "preferences": {...}},
+            ...
+        ],
+        "limit": 5
+    }
+
+    每个条件返回一行 {"index", "id", "status", "recommendations" 或 "error"}，
+    单个条件出错不影响其他条件，最后一行为 {"status": "complete", "kg_version", "total", "succeeded", "failed"}
+    """
+
+    engine, error = select_engine()
+    if error:
+        return error
+
+    data = request.get_json(silent=True)
+    scenarios = data.get('scenarios') if isinstance(data, dict) else data
+    if not isinstance(scenarios, list):
+        return jsonify({
+            "error": "请求体必须包含 scenarios 列表",
+            "status": "error"
+        }), 400
+    if len(scenarios) > config.DECISION_BATCH_MAX_SCENARIOS:
+        return jsonify({
+            "error": f"单次最多 {config.DECISION_BATCH_MAX_SCENARIOS} 个条件",
+            "status": "error"
+        }), 400
+
+    limit, error = parse_limit(data)
+    if error:
+        return error
+
+    def generate():
+        succeeded = failed = 0
+        try:
+            for result in engine.recommend_batch(scenarios, limit):
+                if result['status'] == 'success':
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+        except Exception as e:
+            # 已经开始输出，只能在流中报告错误
+            yield json.dumps({"status": "error", "error": f"批量推荐过程中发生错误: {str(e)}"}, ensure_ascii=False) + '\n'
+        yield json.dumps({"status": "complete", "kg_version": engine.kg_version, "total": len(scenarios),
+                          "succeeded": succeeded, "failed": failed}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @mod.route('/technologies', methods=['GET'])
 def get_all_technologies():
     """获取所有CCUS技术列表API"""
 
-    if decision_engine is None:
-        return jsonify({
-            "error": "决策引擎未初始化",
-            "status": "error"
-        }), 500
+    engine, error = select_engine()
+    if error:
+        return error
 
     try:
-        tech_info = decision_engine.extract_technology_info()
-        technologies = list(tech_info.keys())
+        technologies = list(engine.tech_index.technologies)
 
         return jsonify({
             "status": "success",
+            "kg_version": engine.kg_version,
             "technologies": technologies,
             "total_count": len(technologies),
             "sample_technologies": technologies[:10]  # 返回前10个作为样例
@@ -123,14 +242,12 @@ def get_all_technologies():
 def get_statistics():
     """获取知识图谱统计信息API"""
 
-    if decision_engine is None:
-        return jsonify({
-            "error": "决策引擎未初始化",
-            "status": "error"
-        }), 500
+    engine, error = select_engine()
+    if error:
+        return error
 
     try:
-        stats = decision_engine.get_technology_statistics()
+        stats = engine.get_technology_statistics()
 
         return jsonify({
             "status": "success",
@@ -143,16 +260,49 @@ def get_statistics():
             "status": "error"
         }), 500
 
+@mod.route('/versions', methods=['GET'])
+def get_versions():
+    """已加载的知识图谱版本列表API"""
+
+    if engine_registry is None:
+        return jsonify({
+            "error": "决策引擎未初始化",
+            "status": "error"
+        }), 500
+
+    return jsonify({
+        "status": "success",
+        **engine_registry.status()
+    })
+
+@mod.route('/versions/reload', methods=['POST'])
+def reload_versions():
+    """立即检查候选路径，有新的知识图谱文件时在后台加载并切换API"""
+
+    if engine_registry is None:
+        return jsonify({
+            "error": "决策引擎未初始化",
+            "status": "error"
+        }), 500
+
+    started = engine_registry.check_for_updates(force=True)
+    return jsonify({
+        "status": "success",
+        **engine_registry.status()
+    }), 202 if started else 200
+
 @mod.route('/health', methods=['GET'])
 def health_check():
     """健康检查API"""
 
-    status = "healthy" if decision_engine is not None else "unhealthy"
+    current = engine_registry.current if engine_registry is not None else None
+    status = "healthy" if current is not None else "unhealthy"
 
     return jsonify({
         "status": status,
         "service": "CCUS Decision Engine",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "kg_version": current.kg_version if current is not None else None
     })
 
 # 在模块加载时自动初始化
@@ -1,83 +1,108 @@
 import os
 import json
-from flask import Response, request, Blueprint
+import logging
+from flask import Response, request, Blueprint, jsonify
 
+from app import config
 from app.utils.chat_glm import stream_predict
+from app.utils.logger import logger
+from app.utils.tracing import tracer
+from app.utils.admission import AdmissionController, AdmissionRejected
 
 mod = Blueprint('chat', __name__, url_prefix='/chat')
 
+# 对话生成准入控制：限制并发生成数，超出部分有界排队
+admission = AdmissionController(
+    max_concurrent=config.CHAT_MAX_CONCURRENT,
+    max_queue=config.CHAT_MAX_QUEUE,
+    queue_timeout=config.CHAT_QUEUE_TIMEOUT,
+    latency_target=config.CHAT_LATENCY_TARGET
+)
+
 
 @mod.route('/', methods=['GET'])
 def chat_get():
     return "Chat Get!"
 
 
+@mod.route('/stats', methods=['GET'])
+def chat_stats():
+    """准入控制统计信息：排队长度、等待时间、拒绝次数"""
+    return jsonify({
+        "status": "success",
+        "admission": admission.get_stats()
+    })
+
+
 @mod.route('/', methods=['POST'])
 def chat():
-    print("🚨🚨🚨 CLAUDE DEBUG: CHAT REQUEST RECEIVED 🚨🚨🚨")
-    print("🚨🚨🚨 CLAUDE DEBUG: CHAT REQUEST RECEIVED 🚨🚨🚨")
-    print("🚨🚨🚨 CLAUDE DEBUG: CHAT REQUEST RECEIVED 🚨🚨🚨")
-    print(f"Request method: {request.method}")
-    print(f"Request path: {request.path}")
-    print(f"Request URL: {request.url}")
-    print(f"Request data length: {len(request.data) if request.data else 0}")
-
-    # 现在我知道代码确实被加载了
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("📥 [BACKEND] 收到对话请求: %s %s, 数据长度: %d",
+                     request.method, request.url, len(request.data) if request.data else 0)
 
     try:
         # 解析请求数据
-        print("📥 [BACKEND] 解析请求数据...")
         request_data = json.loads(request.data)
-        print(f"📥 [BACKEND] 请求数据大小: {len(request.data)} bytes")
-        print(f"📥 [BACKEND] 请求数据结构: {list(request_data.keys())}")
 
         # 支持 query 和 prompt 两种字段名
         prompt = request_data.get('query') or request_data.get('prompt')
         history = request_data.get('history', [])
 
-        print(f"💬 [BACKEND] 用户输入: {prompt}")
-        print(f"📚 [BACKEND] 历史记录长度: {len(history)}")
+        if debug:
+            logger.debug("💬 [BACKEND] 用户输入: %s, 历史记录长度: %d", prompt, len(history))
 
         if not prompt:
-            print("❌ [BACKEND] 错误：没有提供prompt")
+            logger.info("❌ [BACKEND] 错误：没有提供prompt")
             error_response = json.dumps({
                 "error": "No prompt provided",
                 "updates": {"response": "错误：没有提供问题内容"}
             }, ensure_ascii=False)
             return Response(response=error_response, content_type='application/json', status=400)
 
-        print("🔄 [BACKEND] 开始调用stream_predict函数...")
+        # 申请生成名额，排队已满或预计超出延迟目标时返回429
+        try:
+            ticket = admission.acquire()
+        except AdmissionRejected as e:
+            logger.warning("⛔ [BACKEND] 请求未被准入: %s, Retry-After: %ss", e.reason, e.retry_after)
+            tracer.incr("chat_rejected_total", reason=e.reason)
+            error_response = json.dumps({
+                "error": "Too many requests",
+                "reason": e.reason,
+                "updates": {"response": "当前请求较多，请稍后再试"}
+            }, ensure_ascii=False)
+            return Response(response=error_response, content_type='application/json', status=429,
+                            headers={"Retry-After": str(e.retry_after)})
+
+        if debug:
+            logger.debug("🔄 [BACKEND] 开始调用stream_predict函数... (排队%.2fs)", ticket.wait_time)
 
-        # 包装stream_predict以添加调试信息
+        # 调试模式下逐块校验输出格式
         def debug_stream_predict():
             chunk_count = 0
             for chunk in stream_predict(prompt, history=history):
                 chunk_count += 1
-                print(f"📤 [BACKEND] 发送第{chunk_count}个数据块，大小: {len(chunk)} bytes")
-
                 try:
-                    # 尝试解析JSON以验证格式
                     decoded_chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
                     parsed_data = json.loads(decoded_chunk.strip())
-                    print(f"📤 [BACKEND] 数据块内容结构: {list(parsed_data.keys())}")
-
-                    if 'updates' in parsed_data and 'response' in parsed_data['updates']:
-                        response_preview = parsed_data['updates']['response'][:100]
-                        print(f"📤 [BACKEND] 响应内容预览: {response_preview}...")
-
+                    logger.debug("📤 [BACKEND] 第%d个数据块，大小: %d bytes, 结构: %s",
+                                 chunk_count, len(chunk), list(parsed_data.keys()))
                 except Exception as e:
-                    print(f"⚠️ [BACKEND] 数据块格式验证失败: {e}")
-                    print(f"⚠️ [BACKEND] 数据块内容: {chunk[:200]}...")
+                    logger.warning("⚠️ [BACKEND] 数据块格式验证失败: %s, 内容: %s...", e, chunk[:200])
 
                 yield chunk
 
-            print(f"✅ [BACKEND] stream_predict完成，总共发送了{chunk_count}个数据块")
+            logger.debug("✅ [BACKEND] stream_predict完成，总共发送了%d个数据块", chunk_count)
 
-        return Response(response=debug_stream_predict(), content_type='application/json', status=200)
+        stream = debug_stream_predict() if debug else stream_predict(prompt, history=history)
+        response = Response(response=admission.wrap_stream(ticket, stream),
+                            content_type='application/json', status=200)
+        # 客户端在生成开始前断开时生成器不会执行，需要在关闭响应时兜底释放
+        response.call_on_close(ticket.release)
+        return response
 
     except json.JSONDecodeError as e:
-        print(f"❌ [BACKEND] JSON解析错误: {e}")
-        print(f"❌ [BACKEND] 原始请求数据: {request.data}")
+        logger.info("❌ [BACKEND] JSON解析错误: %s", e)
         error_response = json.dumps({
             "error": "Invalid JSON format",
             "updates": {"response": "请求格式错误：无效的JSON"}
@@ -85,9 +110,7 @@ def chat():
         return Response(response=error_response, content_type='application/json', status=400)
 
     except Exception as e:
-        print(f"❌ [BACKEND] 处理请求时发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ [BACKEND] 处理请求时发生错误: %s", e)
         error_response = json.dumps({
             "error": str(e),
             "updates": {"response": f"服务器错误：{str(e)}"}
@@ -1,7 +1,9 @@
-import os
-import json
-from flask import request, Blueprint, jsonify
-from thefuzz import process
+from flask import request, Blueprint, Response, jsonify
+
+from app import config
+from app.utils.graph_index import RANKINGS
+from app.utils.graph_paths import find_relation_paths
+from app.utils.graph_store import graph_store
 
 
 mod = Blueprint('graph', __name__, url_prefix='/graph')
@@ -9,32 +11,162 @@ mod = Blueprint('graph', __name__, url_prefix='/graph')
 
 @mod.route('/', methods=['GET'])
 def graph():
-    # 尝试加载CCUS知识图谱数据，如果不存在则使用原始数据
-    ccus_data_path = 'data/ccus_data.json'
-    fallback_data_path = 'data/data.json'
-
-    if os.path.exists(ccus_data_path):
-        with open(ccus_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        message = 'CCUS Knowledge Graph Loaded!'
-    else:
-        with open(fallback_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        message = 'Fallback Data Loaded!'
+    # 加载CCUS知识图谱数据，如果不存在则使用原始数据
+    # 响应体按图谱版本预先序列化和压缩，客户端缓存未过期时返回304
+    snapshot = graph_store.current()
+    encoding = request.accept_encodings.best_match(list(snapshot.encodings))
+
+    response = Response(snapshot.body(encoding), mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Graph-Version'] = snapshot.version  # 之后可用 /graph/changes?since=版本 获取增量
+    response.set_etag(f"{snapshot.version}-{encoding or 'identity'}")
+    response.last_modified = snapshot.mtime
+    return response.make_conditional(request)
+
+
+def _ranking():
+    ranking = request.args.get('rank', 'degree')
+    return ranking if ranking in RANKINGS else None
+
 
+@mod.route('/overview', methods=['GET'])
+def overview():
+    """图谱概览：按度数或PageRank排序的前N个节点，以及主要社区和社区间聚合边"""
+    max_nodes = request.args.get('max_nodes', default=config.GRAPH_OVERVIEW_NODES, type=int)
+    ranking = _ranking()
+    if ranking is None:
+        return jsonify({'message': f"rank 必须是 {'/'.join(RANKINGS)} 之一"}), 400
+
+    snapshot = graph_store.current()
+    data = snapshot.index.overview(max(1, min(max_nodes, config.GRAPH_MAX_NODES)), ranking,
+                                   max_links=config.GRAPH_MAX_LINKS,
+                                   max_clusters=config.GRAPH_OVERVIEW_CLUSTERS)
+    data['version'] = snapshot.version
     return jsonify({
         'data': data,
-        'message': message
+        'message': snapshot.message
+    })
+
+
+@mod.route('/expand', methods=['GET'])
+def expand():
+    """从某个节点逐步展开邻居：?node=id&hops=k&limit=m"""
+    node = request.args.get('node')
+    hops = request.args.get('hops', default=1, type=int)
+    limit = request.args.get('limit', default=100, type=int)
+    ranking = _ranking()
+    if node is None or ranking is None:
+        return jsonify({'message': '缺少 node 参数或 rank 参数无效'}), 400
+
+    snapshot = graph_store.current()
+    index = snapshot.index
+    # 查询参数是字符串，前端图谱的节点id通常是整数
+    node_id = int(node) if node.lstrip('-').isdigit() and int(node) in index.id_to_index else node
+    data = index.expand(node_id,
+                        hops=max(1, min(hops, config.GRAPH_EXPAND_MAX_HOPS)),
+                        limit=max(1, min(limit, config.GRAPH_MAX_NODES)),
+                        ranking=ranking,
+                        max_links=config.GRAPH_MAX_LINKS)
+    if data is None:
+        return jsonify({'message': f'节点不存在: {node}'}), 404
+    data['version'] = snapshot.version
+    return jsonify({
+        'data': data,
+        'message': snapshot.message
+    })
+
+
+@mod.route('/cluster', methods=['GET'])
+def cluster():
+    """某个社区内最重要的节点及相关社区：?id=c&limit=m"""
+    cluster_id = request.args.get('id', type=int)
+    limit = request.args.get('limit', default=100, type=int)
+    ranking = _ranking()
+    if cluster_id is None or ranking is None:
+        return jsonify({'message': '缺少 id 参数或 rank 参数无效'}), 400
+
+    snapshot = graph_store.current()
+    data = snapshot.index.cluster_view(cluster_id,
+                                       limit=max(1, min(limit, config.GRAPH_MAX_NODES)),
+                                       ranking=ranking,
+                                       max_links=config.GRAPH_MAX_LINKS)
+    if data is None:
+        return jsonify({'message': f'社区不存在: {cluster_id}'}), 404
+    data['version'] = snapshot.version
+    return jsonify({
+        'data': data,
+        'message': snapshot.message
+    })
+
+
+@mod.route('/search', methods=['GET'])
+def search():
+    """实体模糊检索：?q=关键词&limit=n，返回匹配分数和1跳邻居预览"""
+    query = request.args.get('q') or request.args.get('search', '')
+    limit = request.args.get('limit', default=10, type=int)
+    ranking = _ranking()
+    if not query.strip() or ranking is None:
+        return jsonify({'message': '缺少 q 参数或 rank 参数无效'}), 400
+
+    snapshot = graph_store.current()
+    results = snapshot.search.search(query, limit=max(1, min(limit, config.GRAPH_SEARCH_MAX_RESULTS)),
+                                     ranking=ranking)
+    return jsonify({
+        'data': {'query': query, 'results': results, 'version': snapshot.version},
+        'message': 'Got it!'
+    })
+
+
+@mod.route('/suggest', methods=['GET'])
+def suggest():
+    """实体输入提示：?q=前缀&limit=n，按度数或PageRank排序"""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', default=config.GRAPH_SUGGEST_TOP_K, type=int)
+    ranking = _ranking()
+    if ranking is None:
+        return jsonify({'message': f"rank 必须是 {'/'.join(RANKINGS)} 之一"}), 400
+
+    snapshot = graph_store.current()
+    return jsonify({
+        'data': {'query': query, 'results': snapshot.suggest.suggest(query, limit=max(1, limit), ranking=ranking)},
+        'message': 'Got it!'
+    })
+
+
+@mod.route('/path', methods=['GET'])
+def path():
+    """两个实体之间的关联路径：?from=实体&to=实体&max_hops=n&k=m，实体可以是节点id或名称"""
+    source, target = request.args.get('from'), request.args.get('to')
+    max_hops = request.args.get('max_hops', default=4, type=int)
+    k = request.args.get('k', default=3, type=int)
+    if not source or not target:
+        return jsonify({'message': '缺少 from 或 to 参数'}), 400
+
+    snapshot = graph_store.current()
+    paths = find_relation_paths(snapshot, source, target,
+                                k=max(1, min(k, config.GRAPH_PATH_MAX_K)),
+                                max_hops=max(1, min(max_hops, config.GRAPH_PATH_MAX_HOPS)))
+    if paths is None:
+        return jsonify({'message': f'实体不存在: {source} / {target}'}), 404
+    return jsonify({
+        'data': {'from': source, 'to': target, 'paths': paths, 'version': snapshot.version},
+        'message': 'Got it!' if paths else '在限定跳数内没有找到关联路径'
     })
 
 
-# @mod.route('/search', methods=['GET'])
-# def get_triples():
-#     # 获取参数
-#     user_input = request.args.get('search')
-#     result = search_node_item(user_input)
+@mod.route('/changes', methods=['GET'])
+def changes():
+    """从 ?since=版本 到当前版本的增量：新增的节点和边（完整内容）以及删除的节点和边（uid）"""
+    since = request.args.get('since')
+    if not since:
+        return jsonify({'message': '缺少 since 参数'}), 400
 
-#     return jsonify({
-#         'data': result,
-#         'message': 'Got it!'
-#     })
+    diff = graph_store.changes(since)
+    if diff is None:
+        # 版本未知或已超出保留范围，客户端需要重新获取完整图谱
+        return jsonify({'data': {'since': since, 'version': graph_store.current().version},
+                        'message': '版本已过期，请通过 GET /graph/ 重新获取完整图谱'}), 410
+    return jsonify({'data': diff, 'message': 'Got it!'})
@@ -0,0 +1,14 @@
+from flask import Response, Blueprint
+
+from app.utils.tracing import tracer, format_gauges
+from app.views.chat import admission
+
+mod = Blueprint('metrics', __name__)
+
+
+@mod.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus文本格式的监控指标：各阶段延迟直方图、请求计数和准入控制状态"""
+    body = tracer.render_prometheus()
+    body += format_gauges('ccus_chat_admission', admission.get_stats())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
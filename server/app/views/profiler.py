@@ -0,0 +1,66 @@
+import os
+import time
+
+from flask import Blueprint, jsonify, request, send_file
+
+from app import config
+from app.utils.profiler import profile_store, sampling_profiler, PROFILE_HEADER
+
+mod = Blueprint('profiler', __name__, url_prefix='/admin/profile')
+
+
+@mod.before_request
+def check_enabled():
+    if not config.PROFILING_ENABLED:
+        return jsonify({"error": "性能分析未开启（PROFILING_ENABLED=0）", "status": "error"}), 403
+    if config.PROFILING_TOKEN and request.headers.get(PROFILE_HEADER) != config.PROFILING_TOKEN:
+        return jsonify({"error": "缺少或错误的分析令牌", "status": "error"}), 403
+
+
+@mod.route('/start', methods=['POST'])
+def start_profile():
+    """启动采样分析窗口，?seconds=N 指定时长"""
+    seconds = request.args.get('seconds', default=30, type=int)
+    seconds = max(1, min(seconds, config.PROFILE_MAX_SECONDS))
+    if not sampling_profiler.start(seconds):
+        return jsonify({"error": "已有采样分析正在进行", "status": "error"}), 409
+    return jsonify({"status": "success", "seconds": seconds})
+
+
+@mod.route('/stop', methods=['POST'])
+def stop_profile():
+    """提前结束采样分析窗口，结果照常保存"""
+    running = sampling_profiler.running
+    sampling_profiler.stop()
+    return jsonify({"status": "success", "stopped": running})
+
+
+@mod.route('/', methods=['GET'])
+def list_profiles():
+    return jsonify({
+        "status": "success",
+        "sampling": {
+            "running": sampling_profiler.running,
+            "remaining": round(max(0.0, sampling_profiler.until - time.time()), 1)
+            if sampling_profiler.running else 0.0,
+        },
+        "profiles": profile_store.list(),
+    })
+
+
+@mod.route('/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    summary = profile_store.summary(profile_id)
+    if summary is None:
+        return jsonify({"error": "分析结果不存在", "status": "error"}), 404
+    return jsonify({"status": "success", "data": summary})
+
+
+@mod.route('/<profile_id>/download', methods=['GET'])
+def download_profile(profile_id):
+    """下载原始分析文件：cProfile 的 .prof 或采样的 .collapsed"""
+    summary = profile_store.summary(profile_id)
+    if summary is None:
+        return jsonify({"error": "分析结果不存在", "status": "error"}), 404
+    path = os.path.abspath(profile_store.path(profile_id, summary["format"]))
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path))
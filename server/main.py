@@ -3,6 +3,7 @@ from app import apps
 
 os.environ["CUDA_VISIBLE_DEVICES"] = "0"
 
+from app import config
 from app.utils.chat_glm import start_model
 
 
@@ -24,7 +25,7 @@ if __name__ == '__main__':
                     continue
         return None
 
-    port = find_free_port(5000)
+    port = find_free_port(config.SERVER_PORT)
     if port:
         print(f"🚀 Starting server on port {port}")
         apps.run(host='0.0.0.0', port=port, debug=False, threaded=True)